@@ -0,0 +1,462 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class LatencyRecorder:
+    """
+        - Description:
+            - Thread-safe collection of per-call latencies grouped by stage name (llm, embed, vector_search, ...).
+    """
+
+    def __init__(self):
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def summary(self):
+        """
+            - Returns:
+                - dict: stage -> calls, p50_ms, p99_ms
+        """
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+        result = {}
+        for stage, values in samples.items():
+            result[stage] = {
+                "calls": len(values),
+                "p50_ms": round(values[len(values) // 2] * 1000, 3),
+                "p99_ms": round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 3)
+            }
+        return result
+
+
+class FakeServiceError(Exception):
+    status_code = 500
+
+
+class FakeRateLimitError(Exception):
+    """Looks like an OpenAI/HTTP 429 to helpers.rate_limiter.is_rate_limit_error."""
+    status_code = 429
+
+
+class FakeBehavior:
+    """
+        - Parameters:
+            - latency: float (mean seconds per call)
+            - error_rate: float (probability of a 500-style failure)
+            - rate_limit_rate: float (probability of a 429)
+            - seed: int
+
+        - Description:
+            - Shared latency / failure model for every fake service.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def outcome(self):
+        """
+            - Returns:
+                - tuple: (sleep seconds, None | "error" | "rate_limit")
+        """
+        with self._lock:
+            roll = self._random.random()
+            jitter = self._random.uniform(0.5, 1.5)
+        failure = None
+        if roll < self.rate_limit_rate:
+            failure = "rate_limit"
+        elif roll < self.rate_limit_rate + self.error_rate:
+            failure = "error"
+        return self.latency * jitter, failure
+
+    def call(self, stage, recorder):
+        delay, failure = self.outcome()
+        started = time.perf_counter()
+        if delay:
+            time.sleep(delay)
+        recorder.record(stage, time.perf_counter() - started)
+        if failure == "rate_limit":
+            raise FakeRateLimitError(f"429 rate limit exceeded ({stage})")
+        if failure == "error":
+            raise FakeServiceError(f"500 fake {stage} failure")
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def make_fake_chat_model(behavior, recorder):
+    """
+        - Returns:
+            - Runnable: stands in for ChatOpenAI(model="gpt-4o"), returning a templated email with usage metadata
+    """
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    def respond(prompt_value):
+        behavior.call("llm", recorder)
+        prompt = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+        input_tokens = len(prompt) // 4 + 1
+        content = (
+            "Hi [First Name],\nAs [Title] at [Company Name] you know how much operations matter. "
+            f"Reference {_digest(prompt).hex()[:8]}.\nBest regards"
+        )
+        output_tokens = len(content) // 4 + 1
+        return AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        })
+
+    return RunnableLambda(respond)
+
+
+class FakeEmbeddings:
+    """Deterministic hash embeddings standing in for OpenAIEmbeddings."""
+
+    model = "fake-embedding"
+
+    def __init__(self, behavior, recorder, dimensions=64):
+        self.behavior = behavior
+        self.recorder = recorder
+        self.dimensions = dimensions
+
+    def _vector(self, text):
+        seed = _digest(text)
+        rng = random.Random(seed)
+        return [rng.uniform(-1, 1) for _ in range(self.dimensions)]
+
+    def embed_documents(self, texts):
+        self.behavior.call("embed", self.recorder)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class FakeVectorStore:
+    """Stands in for AstraDBVectorStore with a fixed synthetic success-story corpus."""
+
+    def __init__(self, behavior, recorder, corpus_size=2000):
+        from langchain_core.documents import Document
+        self.behavior = behavior
+        self.recorder = recorder
+        self.documents = [
+            Document(page_content=f"Success story {i}: a healthcare provider cut billing delays by {i % 50 + 10}%.")
+            for i in range(corpus_size)
+        ]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        self.behavior.call("vector_search", self.recorder)
+        start = int(abs(embedding[0]) * len(self.documents)) % len(self.documents)
+        return [self.documents[(start + i) % len(self.documents)] for i in range(k)]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        return [(document, 1.0 - i * 0.01) for i, document in enumerate(self.similarity_search_by_vector(embedding, k))]
+
+
+_CELL = re.compile(r"([A-Z]+)(\d+)")
+
+
+def _column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+class FakeWorksheet:
+    """
+        - Parameters:
+            - rows: list of lists (first row is the header)
+            - behavior: FakeBehavior
+            - recorder: LatencyRecorder
+
+        - Description:
+            - The subset of gspread.Worksheet used by the pipeline, backed by an in-memory grid.
+    """
+
+    id = 0
+
+    def __init__(self, rows, behavior, recorder):
+        self.rows = [list(row) for row in rows]
+        self.behavior = behavior
+        self.recorder = recorder
+        self.api_calls = 0
+        self.spreadsheet = self
+
+    def _call(self):
+        self.api_calls += 1
+        self.behavior.call("sheets", self.recorder)
+
+    def get_all_values(self):
+        self._call()
+        return [list(row) for row in self.rows]
+
+    def get_all_records(self):
+        self._call()
+        header = self.rows[0]
+        return [dict(zip(header, row + [""] * (len(header) - len(row)))) for row in self.rows[1:]]
+
+    def row_values(self, row):
+        self._call()
+        return list(self.rows[row - 1])
+
+    def col_values(self, col):
+        self._call()
+        return [row[col - 1] if len(row) >= col else "" for row in self.rows]
+
+    def batch_get(self, ranges):
+        self._call()
+        result = []
+        for cell_range in ranges:
+            start, end = cell_range.split(":")
+            start_col, start_row = _CELL.match(start).groups()
+            end_col, end_row = _CELL.match(end).groups()
+            result.append([
+                self.rows[row - 1][_column_number(start_col) - 1:_column_number(end_col)]
+                for row in range(int(start_row), int(end_row) + 1) if row <= len(self.rows)
+            ])
+        return result
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values])
+
+    def append_rows(self, values, **kwargs):
+        self._call()
+        self.rows.extend(list(row) for row in values)
+
+    def batch_update(self, data, **kwargs):
+        self._call()
+        # Worksheet.batch_update takes value ranges; Spreadsheet.batch_update takes a requests body
+        if isinstance(data, dict):
+            for request in data.get("requests", []):
+                span = request["deleteDimension"]["range"]
+                del self.rows[span["startIndex"]:span["endIndex"]]
+            return
+        for update in data:
+            start = update["range"].split(":")[0]
+            col, row = _CELL.match(start).groups()
+            row_index, col_index = int(row) - 1, _column_number(col) - 1
+            for offset, value in enumerate(update["values"][0]):
+                target = self.rows[row_index]
+                target.extend([""] * (col_index + offset + 1 - len(target)))
+                target[col_index + offset] = value
+
+    def delete_rows(self, index):
+        self._call()
+        del self.rows[index - 1]
+
+
+class FakeSheetsClient:
+    """Returned in place of gspread.authorize(); open_by_key(...).sheet1 resolves to a FakeWorksheet."""
+
+    def __init__(self, worksheets):
+        self.worksheets = worksheets
+
+    def open_by_key(self, key):
+        worksheet = self.worksheets[key]
+        return type("FakeSpreadsheet", (), {"sheet1": worksheet})()
+
+
+class _FakeRequest:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeSheetsService:
+    """
+        - Parameters:
+            - worksheet: FakeWorksheet (the spreadsheet's first sheet)
+
+        - Description:
+            - Returned in place of googleapiclient's build('sheets', 'v4'); supports the
+              spreadsheets().values() get, batchUpdate and append calls get_emails.py makes.
+    """
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    @staticmethod
+    def _cells(cell_range):
+        return cell_range.split("!")[-1]
+
+    def get(self, spreadsheetId, range):
+        def run():
+            start, end = self._cells(range).split(":")
+            first, last = _column_number(_CELL.match(start + "1").group(1)) - 1, _column_number(_CELL.match(end + "1").group(1))
+            values = [row[first:last] for row in self.worksheet.get_all_values()]
+            while values and not any(values[-1]):
+                values.pop()
+            return {"range": range, "values": values}
+        return _FakeRequest(run)
+
+    def batchUpdate(self, spreadsheetId, body):
+        def run():
+            data = [{"range": self._cells(update["range"]), "values": update["values"]} for update in body["data"]]
+            self.worksheet.batch_update(data)
+            return {"totalUpdatedRows": len(data)}
+        return _FakeRequest(run)
+
+    def append(self, spreadsheetId, range, valueInputOption, insertDataOption, body):
+        def run():
+            first_row = len(self.worksheet.rows) + 1
+            self.worksheet.append_rows(body["values"])
+            last_row = len(self.worksheet.rows)
+            return {"updates": {"updatedRange": f"Sheet1!A{first_row}:C{last_row}", "updatedRows": last_row - first_row + 1}}
+        return _FakeRequest(run)
+
+
+class FakeZohoServer:
+    """
+        - Parameters:
+            - leads: list of dict (id, Email, Modified_Time)
+            - behavior: FakeBehavior
+            - recorder: LatencyRecorder
+
+        - Description:
+            - Local HTTP stand-in for Zoho's token endpoint, paginated GET /Leads (page and page_token,
+              If-Modified-Since) and POST /Leads/upsert. Serves on a random localhost port.
+    """
+
+    def __init__(self, leads, behavior, recorder, per_page_limit=200):
+        self.leads = leads
+        self.behavior = behavior
+        self.recorder = recorder
+        self.per_page_limit = per_page_limit
+        self.upserted = {}
+        self.token_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=None, headers=None):
+                payload = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _simulate(self):
+                delay, failure = fake.behavior.outcome()
+                started = time.perf_counter()
+                if delay:
+                    time.sleep(delay)
+                fake.recorder.record("zoho", time.perf_counter() - started)
+                if failure == "rate_limit":
+                    self._send(429, {"code": "TOO_MANY_REQUESTS"}, {"Retry-After": "0"})
+                    return False
+                if failure == "error":
+                    self._send(500, {"code": "INTERNAL_ERROR"})
+                    return False
+                return True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                path = urlsplit(self.path).path
+                if not self._simulate():
+                    return
+                if path.endswith("/token"):
+                    with fake._lock:
+                        fake.token_requests += 1
+                    self._send(200, {"access_token": f"fake-token-{fake.token_requests}", "expires_in": 3600})
+                elif path.endswith("/Leads/upsert"):
+                    records = json.loads(raw or b"{}").get("data", [])
+                    if len(records) > 100:
+                        self._send(400, {"code": "LIMIT_EXCEEDED"})
+                        return
+                    results = []
+                    with fake._lock:
+                        for record in records:
+                            action = "update" if record.get("Email") in fake.upserted else "insert"
+                            fake.upserted[record.get("Email")] = record
+                            results.append({"code": "SUCCESS", "status": "success", "action": action, "message": f"record {action}ed"})
+                    self._send(200, {"data": results})
+                else:
+                    self._send(404, {"code": "NOT_FOUND"})
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if not parts.path.endswith("/Leads"):
+                    self._send(404, {"code": "NOT_FOUND"})
+                    return
+                if not self._simulate():
+                    return
+                query = parse_qs(parts.query)
+                per_page = min(int(query.get("per_page", ["200"])[0]), fake.per_page_limit)
+                if "page_token" in query:
+                    offset = int(query["page_token"][0])
+                else:
+                    offset = (int(query.get("page", ["1"])[0]) - 1) * per_page
+
+                leads = fake.leads
+                since = self.headers.get("If-Modified-Since")
+                if since:
+                    try:
+                        cutoff = datetime.fromisoformat(since)
+                    except ValueError:
+                        cutoff = parsedate_to_datetime(since)
+                    leads = [lead for lead in leads if datetime.fromisoformat(lead["Modified_Time"]) > cutoff]
+                    if not leads:
+                        self._send(304)
+                        return
+
+                page = leads[offset:offset + per_page]
+                if not page:
+                    self._send(204)
+                    return
+                more = offset + per_page < len(leads)
+                info = {"per_page": per_page, "count": len(page), "more_records": more}
+                if more:
+                    info["next_page_token"] = str(offset + per_page)
+                self._send(200, {"data": page, "info": info})
+
+        return Handler
@@ -0,0 +1,102 @@
+import csv
+import random
+from datetime import datetime, timedelta, timezone
+
+FIRST_NAMES = ["Ayesha", "Hashim", "Sara", "John", "Maria", "Wei", "Fatima", "Liam", "Olivia", "Yahya"]
+LAST_NAMES = ["Qureshi", "Nadeem", "Smith", "Garcia", "Chen", "Khan", "Brown", "Lopez", "Patel", "Kim"]
+TITLES = ["CEO", "CFO", "CDO", "Director of Operations", "VP Finance", "Billing Manager", "Practice Manager", ""]
+INDUSTRY_WORDS = ["Health", "Care", "Medical", "Clinic", "Wellness", "Therapy", "Dental", "Vision"]
+
+
+def _company(rng, index, companies):
+    number = rng.randrange(companies)
+    return f"{INDUSTRY_WORDS[number % len(INDUSTRY_WORDS)]} Partners {number}", f"company{number}.com"
+
+
+def write_prospects(path, rows, companies=None, seed=1):
+    """
+        - Parameters:
+            - path: str
+            - rows: int (1k to 1M)
+            - companies: int or None (distinct domains; defaults to rows // 20)
+            - seed: int
+
+        - Description:
+            - Streams a synthetic prospects.csv (Email, First Name, Last Name, Title, Company) without holding it in memory.
+            - About 5% of rows leave Company or Title empty to exercise the default-filling path.
+    """
+    rng = random.Random(seed)
+    companies = companies or max(1, rows // 20)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Email", "First Name", "Last Name", "Title", "Company"])
+        for index in range(rows):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            company, domain = _company(rng, index, companies)
+            writer.writerow([
+                f"{first.lower()}.{last.lower()}{index}@{domain}",
+                first,
+                last,
+                rng.choice(TITLES) if rng.random() > 0.05 else "",
+                company if rng.random() > 0.05 else ""
+            ])
+
+
+def write_customers(path, rows, companies=None, seed=2):
+    """
+        - Parameters:
+            - path: str
+            - rows: int
+            - companies: int or None
+            - seed: int
+
+        - Description:
+            - Streams a synthetic existing-customers CSV with the columns read_data expects (and drops).
+    """
+    rng = random.Random(seed)
+    companies = companies or max(1, rows // 5)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Record Id", "Account Name", "AP Email", "Annual Service Renew", "Important Notes", "Payment Terms"])
+        for index in range(rows):
+            company, domain = _company(rng, index, companies)
+            writer.writerow([index, company, f"ap{index}@{domain}", "", "", "Net 30"])
+
+
+def make_leads(rows, companies=None, seed=3):
+    """
+        - Returns:
+            - list: Zoho lead dicts (id, Email, Modified_Time) spread over the last 30 days
+    """
+    rng = random.Random(seed)
+    companies = companies or max(1, rows // 5)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    leads = []
+    for index in range(rows):
+        _, domain = _company(rng, index, companies)
+        modified = now - timedelta(minutes=rng.randrange(30 * 24 * 60))
+        leads.append({"id": str(10_000_000 + index), "Email": f"lead{index}@{domain}", "Modified_Time": modified.isoformat()})
+    return leads
+
+
+def make_tracking_rows(rows, hot_fraction=0.1, seed=4):
+    """
+        - Returns:
+            - list: tracking sheet grid (header first) matching the column layout in app_script.js
+    """
+    rng = random.Random(seed)
+    header = ["Email_address", "Subject", "Email Template Body", "Last Sent", "Status", "Last Open", "Open_Amount", "Sent Timestamp"]
+    grid = [header]
+    for index in range(rows):
+        opens = rng.randint(6, 20) if rng.random() < hot_fraction else rng.randint(0, 5)
+        grid.append([
+            f"prospect{index}@company{index % 500}.com",
+            f"Enhancing Healthcare Operations for Prospect {index}",
+            "Hi there,<br>We help healthcare teams...",
+            "2024-01-01 09:00:00",
+            "Opened" if opens else "Sent",
+            "2024-01-02 10:00:00" if opens else "",
+            str(opens) if opens else "",
+            "2024-01-01 09:00:00"
+        ])
+    return grid
@@ -0,0 +1,65 @@
+"""
+Import-time benchmark for the pipeline entry points.
+
+Imports each module in a fresh interpreter with outbound sockets disabled, so any network call made at
+import time fails the run, and reports the wall-clock import time in milliseconds.
+
+    python benchmarks/import_time.py --repeat 5
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+MODULES = ("helpers.agent", "helpers.create_call_script", "helpers.create_email")
+
+CHILD = """
+import socket, sys, time
+def _no_network(*args, **kwargs):
+    raise RuntimeError("network access during import")
+socket.socket.connect = _no_network
+socket.create_connection = _no_network
+sys.path.insert(0, {src!r})
+import functions
+sys.modules["helpers"] = functions
+started = time.perf_counter()
+import {module}
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def time_import(module):
+    """
+        - Parameters:
+            - module: str
+
+        - Returns:
+            - float: milliseconds spent importing `module` in a fresh interpreter
+    """
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD.format(src=str(SRC_DIR), module=module)],
+        capture_output=True, text=True, cwd=SRC_DIR
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{completed.stderr.strip()}")
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure entry-point import time with the network disabled")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--modules", default=",".join(MODULES))
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules.split(","):
+        timings = sorted(time_import(module) for _ in range(args.repeat))
+        results[module] = {"best_ms": round(timings[0], 1), "median_ms": round(timings[len(timings) // 2], 1)}
+        print(f"{module:<32} best {results[module]['best_ms']:>8.1f} ms   median {results[module]['median_ms']:>8.1f} ms")
+    print("BENCHMARK_RESULT " + json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Offline throughput benchmark for the email pipeline.
+
+Runs create_email, get_emails.main, process_email_tracking and the send dispatcher against local stand-ins
+for OpenAI, AstraDB, Zoho, Google Sheets and SMTP, and reports rows/sec, p50/p99 latency per external stage and peak RSS.
+Each stage runs in its own subprocess so peak RSS is measured per stage.
+
+    python benchmarks/run.py --rows 10000 --llm-latency 0.3 --rate-limit-rate 0.01
+"""
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCHMARK_DIR.parent / "src"
+STAGES = ("create_email", "get_emails", "call_scripts", "send")
+
+sys.path.insert(0, str(BENCHMARK_DIR))
+from fakes import (  # noqa: E402
+    FakeBehavior, FakeEmbeddings, FakeSheetsClient, FakeSheetsService, FakeVectorStore, FakeWorksheet, FakeZohoServer,
+    LatencyRecorder, make_fake_chat_model
+)
+from generators import make_leads, make_tracking_rows, write_prospects  # noqa: E402
+
+TRACKING_SHEET_ID = "bench-tracking-sheet"
+CALL_SCRIPT_SHEET_ID = "bench-call-script-sheet"
+
+
+def install_helpers(zoho_url):
+    """
+        - Parameters:
+            - zoho_url: str
+
+        - Description:
+            - Makes src/functions importable as `helpers` (the name the entry points use) and provides a
+              helpers.config module pointing Zoho at the local fake server.
+    """
+    os.environ.setdefault("OPENAI_API_KEY", "bench-fake-key")
+    sys.path.insert(0, str(SRC_DIR))
+    import functions
+    sys.modules["helpers"] = functions
+
+    import helpers.utlis
+    sys.modules.setdefault("helpers.utils", helpers.utlis)
+
+    config = types.ModuleType("helpers.config")
+    config.email_google_sheet = TRACKING_SHEET_ID
+    config.call_script_google_sheet = CALL_SCRIPT_SHEET_ID
+    config.CLIENT_ID = "bench-client"
+    config.CLIENT_SECRET = "bench-secret"
+    config.REFRESH_TOKEN = "bench-refresh"
+    config.ZOHO_API_BASE_URL = f"{zoho_url}/crm/v2"
+    config.TOKEN_URL = f"{zoho_url}/oauth/v2/token"
+    sys.modules["helpers.config"] = config
+
+
+def install_fake_agent(args, recorder):
+    """
+        - Description:
+            - Overrides the lazily built helpers.agent components so email_agent and batch_retriever run
+              against the fakes; nothing real is ever constructed.
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+    from helpers.llm_cache import CachedAgent, get_llm_cache
+    from helpers.retrieval import BatchRetriever
+
+    prompt_template = ChatPromptTemplate([
+        ("system", "You are a sales assistant writing short, personalized outreach emails."),
+        ("user", "Write an email with provided instructions and to the following people based on the instructions provided. You will also recieve context, however, at times the context will be empty. Here is the context: {context}"),
+    ])
+    llm = make_fake_chat_model(behavior(args, args.llm_latency), recorder)
+    embeddings = FakeEmbeddings(behavior(args, args.embed_latency), recorder)
+    vector_store = FakeVectorStore(behavior(args, args.search_latency), recorder)
+    if args.vector_backend == "local":
+        # Embed the fake corpus once into an on-disk index, as build_local_index.py would
+        from helpers.local_index import LocalVectorIndex
+        index_embeddings = FakeEmbeddings(FakeBehavior(latency=0.0), LatencyRecorder())
+        vector_store = LocalVectorIndex.build(vector_store.documents, index_embeddings, "data/local_index", ivf_lists=args.ivf_lists)
+
+    import helpers.agent
+    helpers.agent.override(
+        llm=llm,
+        embeddings=embeddings,
+        prompt_template=prompt_template,
+        prompt_version="benchmark",
+        vector_store=vector_store,
+        email_agent=CachedAgent(prompt_template, llm, get_llm_cache()),
+        batch_retriever=BatchRetriever(vector_store, embeddings, k=4)
+    )
+
+def behavior(args, latency):
+    return FakeBehavior(latency=latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+
+
+def count_rows(path):
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+def run_create_email(args, recorder):
+    write_prospects("data/prospects.csv", args.rows)
+    with open("data/zoho_emails.csv", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Email"])
+        writer.writerows([lead["Email"]] for lead in make_leads(max(1, args.rows // 10)))
+
+    import helpers.create_email as create_email_module
+    started = time.perf_counter()
+    output_path = create_email_module.create_email(
+        max_concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        cohorts=args.cohort_variants > 0,
+        cohort_variants=max(1, args.cohort_variants)
+    )
+    elapsed = time.perf_counter() - started
+    return count_rows(output_path), elapsed
+
+
+def run_get_emails(args, recorder):
+    write_prospects("data/prospects.csv", args.rows)
+    sheet = FakeWorksheet([["Email_address", "Subject", "Email Template Body"]], behavior(args, args.sheets_latency), recorder)
+
+    import get_emails
+    get_emails._sheets_service = FakeSheetsService(sheet)
+    started = time.perf_counter()
+    get_emails.main(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    elapsed = time.perf_counter() - started
+    return len(sheet.rows) - 1, elapsed
+
+
+def run_call_scripts(args, recorder):
+    import helpers.create_call_script as create_call_script
+    from helpers.llm_cache import CachedAgent, get_llm_cache
+    from langchain_core.prompts import ChatPromptTemplate
+    create_call_script.call_script_agent = CachedAgent(
+        ChatPromptTemplate([
+            ("system", create_call_script.CALL_SCRIPT_SYSTEM_PROMPT),
+            ("user", create_call_script.CALL_SCRIPT_USER_PROMPT)
+        ]),
+        make_fake_chat_model(behavior(args, args.llm_latency), recorder),
+        get_llm_cache()
+    )
+
+    import clean_and_gen_call_script
+    sheets_behavior = behavior(args, args.sheets_latency)
+    tracking = FakeWorksheet(make_tracking_rows(args.rows), sheets_behavior, recorder)
+    scripts = FakeWorksheet([["Email", "First Name", "Last Name", "Call Script"]], sheets_behavior, recorder)
+    clean_and_gen_call_script.sheets._client = FakeSheetsClient({TRACKING_SHEET_ID: tracking, CALL_SCRIPT_SHEET_ID: scripts})
+
+    started = time.perf_counter()
+    clean_and_gen_call_script.process_email_tracking(TRACKING_SHEET_ID, CALL_SCRIPT_SHEET_ID, max_concurrency=args.concurrency)
+    elapsed = time.perf_counter() - started
+    return args.rows, elapsed
+
+
+def run_send(args, recorder):
+    from helpers.send_dispatcher import Alias, AliasScheduler, LocalSMTPServer, SendDispatcher, SheetStatusWriter, SMTPTransport, load_jobs_from_sheet
+    sheet = FakeWorksheet(
+        [["Email_address", "Subject", "Email Template Body", "Last Sent", "Open Tracking", "Last Open", "Open Amount", "Sent Timestamp"]]
+        + [[f"prospect{index}@example.com", "Subject", "<p>Body</p>"] for index in range(args.rows)],
+        behavior(args, args.sheets_latency), recorder
+    )
+    server = LocalSMTPServer(latency=args.smtp_latency).start()
+    transport = SMTPTransport(*server.address, starttls=False)
+    # Unthrottled aliases, so the stage measures dispatch and write-back overhead rather than pacing
+    aliases = [Alias(f"alias{index}@example.com", args.rows, 60000000) for index in range(args.send_aliases)]
+    dispatcher = SendDispatcher(transport, AliasScheduler(aliases), SheetStatusWriter(sheet), max_workers=args.concurrency)
+
+    started = time.perf_counter()
+    counts = dispatcher.dispatch(load_jobs_from_sheet(sheet))
+    elapsed = time.perf_counter() - started
+    transport.close()
+    server.stop()
+    return counts["Sent"], elapsed
+
+
+def run_stage(args):
+    """
+        - Description:
+            - Runs one stage in a scratch working directory and prints a JSON result line.
+    """
+    recorder = LatencyRecorder()
+    zoho = FakeZohoServer(make_leads(args.leads), behavior(args, args.zoho_latency), recorder).start()
+    workdir = tempfile.mkdtemp(prefix=f"bench-{args.stage}-")
+    os.chdir(workdir)
+    os.makedirs("data", exist_ok=True)
+    try:
+        install_helpers(zoho.url)
+        install_fake_agent(args, recorder)
+        runner = {"create_email": run_create_email, "get_emails": run_get_emails, "call_scripts": run_call_scripts, "send": run_send}[args.stage]
+        rows, elapsed = runner(args, recorder)
+    finally:
+        zoho.stop()
+
+    result = {
+        "stage": args.stage,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "latency": recorder.summary(),
+        "workdir": workdir
+    }
+    print("BENCHMARK_RESULT " + json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline throughput benchmark")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of: " + ", ".join(STAGES))
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--leads", type=int, default=5000, help="Leads served by the fake Zoho API")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--search-latency", type=float, default=0.01)
+    parser.add_argument("--zoho-latency", type=float, default=0.02)
+    parser.add_argument("--sheets-latency", type=float, default=0.05)
+    parser.add_argument("--smtp-latency", type=float, default=0.02)
+    parser.add_argument("--send-aliases", type=int, default=4, help="Sender aliases for the send stage")
+    # The fakes are far faster than any real quota; keep the limiter out of the way unless testing it
+    parser.add_argument("--rpm", type=int, default=10000000, help="Requests per minute for the generation rate limiter")
+    parser.add_argument("--tpm", type=int, default=10000000000, help="Tokens per minute for the generation rate limiter")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--cohort-variants", type=int, default=0, help="Generate in cohort mode with this many variants per cohort (0 = one call per prospect)")
+    parser.add_argument("--vector-backend", choices=("fake", "local"), default="fake", help="fake: simulated Astra round-trips; local: embedded memory-mapped index")
+    parser.add_argument("--ivf-lists", type=int, default=0, help="IVF lists for --vector-backend local (0 = exact search)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.stage:
+        run_stage(args)
+        return
+
+    forwarded = []
+    for name, value in vars(args).items():
+        if name not in ("stages", "stage", "json"):
+            forwarded += [f"--{name.replace('_', '-')}", str(value)]
+    results = []
+    for stage in args.stages.split(","):
+        completed = subprocess.run(
+            [sys.executable, __file__, "--stage", stage, *forwarded],
+            capture_output=True, text=True
+        )
+        lines = [line for line in completed.stdout.splitlines() if line.startswith("BENCHMARK_RESULT ")]
+        if completed.returncode != 0 or not lines:
+            print(f"{stage}: FAILED\n{completed.stderr[-2000:]}")
+            continue
+        result = json.loads(lines[-1][len("BENCHMARK_RESULT "):])
+        results.append(result)
+        print(f"{stage}: {result['rows']} rows in {result['seconds']}s = {result['rows_per_sec']} rows/sec, peak RSS {result['peak_rss_mb']} MB")
+        for name, stats in sorted(result["latency"].items()):
+            print(f"    {name:<14} calls={stats['calls']:<7} p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    if len(results) != len(args.stages.split(",")):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
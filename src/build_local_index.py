@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import time
+
+CHUNK_CHARACTERS = 1000
+
+
+def split_text(text, chunk_characters=CHUNK_CHARACTERS):
+    """
+        - Parameters:
+            - text: str
+            - chunk_characters: int
+
+        - Returns:
+            - list: chunks of whole paragraphs, each at most chunk_characters long where possible
+    """
+    chunks = []
+    current = ""
+    for paragraph in (part.strip() for part in text.split("\n\n")):
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > chunk_characters:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def load_corpus(sources, chunk_characters=CHUNK_CHARACTERS):
+    """
+        - Parameters:
+            - sources: list of file or directory paths (.txt/.md are split into chunks; .jsonl lines hold
+              {"page_content": ..., "metadata": {...}} and are used as-is)
+            - chunk_characters: int
+
+        - Returns:
+            - list: Documents to embed
+    """
+    from langchain_core.documents import Document
+
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, files in os.walk(source):
+                paths.extend(os.path.join(root, name) for name in sorted(files))
+        else:
+            paths.append(source)
+
+    documents = []
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        documents.append(Document(page_content=record["page_content"], metadata=record.get("metadata") or {}))
+        elif path.endswith((".txt", ".md")):
+            with open(path, "r", encoding="utf-8") as file:
+                for index, chunk in enumerate(split_text(file.read(), chunk_characters)):
+                    documents.append(Document(page_content=chunk, metadata={"source": path, "chunk": index}))
+    return documents
+
+
+def main():
+    """
+    Embeds the success-story corpus once and writes the local vector index used when VECTOR_STORE_BACKEND=local.
+    """
+    from helpers.agent import get_embeddings
+    from helpers.local_index import LocalVectorIndex, DEFAULT_LOCAL_INDEX_PATH
+
+    parser = argparse.ArgumentParser(description="Build the embedded local vector index")
+    parser.add_argument("sources", nargs="+", help="Corpus files or directories (.txt, .md, .jsonl)")
+    parser.add_argument("--out", default=DEFAULT_LOCAL_INDEX_PATH)
+    parser.add_argument("--ivf-lists", type=int, default=0, help="Cluster into this many IVF lists (0 = exact search)")
+    parser.add_argument("--chunk-characters", type=int, default=CHUNK_CHARACTERS)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    documents = load_corpus(args.sources, args.chunk_characters)
+    if not documents:
+        print("No documents found!")
+        return
+
+    started = time.perf_counter()
+    index = LocalVectorIndex.build(documents, get_embeddings(), args.out, batch_size=args.batch_size, ivf_lists=args.ivf_lists)
+    print(f"Indexed {index.meta['count']} chunks ({index.meta['dim']} dims) into {args.out} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
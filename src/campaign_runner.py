@@ -0,0 +1,59 @@
+import argparse
+import json
+import socket
+import os
+from helpers.campaign import run_campaign, run_worker, load_queue
+from helpers.job_queue import JobQueue, DEFAULT_QUEUE_PATH, DEFAULT_LEASE_SECONDS
+from helpers.manifest import CampaignManifest
+from helpers.rate_limiter import DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+
+
+def main():
+    """
+    Runs email generation for a campaign across worker processes sharing a lease-based SQLite job queue.
+
+        run     load prospects, start --workers processes here, export data/generated_emails.csv
+        load    only enqueue prospects
+        work    run one worker in this process (e.g. on another host sharing the queue file)
+        status  print job counts
+        export  write the committed results to --output
+    """
+    parser = argparse.ArgumentParser(description="Multi-worker campaign runner")
+    parser.add_argument("command", choices=("run", "load", "work", "status", "export"))
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH)
+    parser.add_argument("--prospects", default="data/prospects.csv")
+    parser.add_argument("--output", default="data/generated_emails.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads per worker")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_REQUESTS_PER_MINUTE, help="Requests per minute for this host (or this worker with `work`)")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TOKENS_PER_MINUTE, help="Tokens per minute for this host (or this worker with `work`)")
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    parser.add_argument("--manifest", help="Campaign manifest: queue only new or changed prospects and record results in it")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_campaign(
+            workers=args.workers, queue_path=args.queue, prospects_path=args.prospects, output_path=args.output,
+            batch_size=args.batch_size, max_concurrency=args.concurrency, requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm, lease_seconds=args.lease_seconds, manifest_path=args.manifest
+        )
+    elif args.command == "work":
+        run_worker(
+            f"{socket.gethostname()}-{os.getpid()}", queue_path=args.queue, batch_size=args.batch_size,
+            max_concurrency=args.concurrency, requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+            lease_seconds=args.lease_seconds, manifest_path=args.manifest
+        )
+    else:
+        queue = JobQueue(args.queue, lease_seconds=args.lease_seconds)
+        if args.command == "load":
+            manifest = CampaignManifest(args.manifest) if args.manifest else None
+            print(f"Queued {load_queue(queue, args.prospects, manifest=manifest)} new prospects.")
+        elif args.command == "status":
+            print(json.dumps(queue.counts()))
+        else:
+            print(f"Exported {queue.export(args.output)} emails to {args.output}")
+        queue.close()
+
+if __name__ == "__main__":
+    main()
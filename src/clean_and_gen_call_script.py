@@ -1,43 +1,25 @@
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from helpers.create_call_script import generate_call_script
-import requests
+from helpers.create_call_script import generate_call_scripts
+import os
+import pandas as pd
 import json
+from helpers.event_store import EventStore
+from helpers.sheets_io import SheetsIO
+from helpers.tracing import get_tracer
+from helpers.zoho_auth import get_token_manager
+from helpers.zoho_upsert import ZohoBulkUpserter
 from helpers.config import email_google_sheet, call_script_google_sheet, CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN, ZOHO_API_BASE_URL, TOKEN_URL
 
-def get_access_token(client_id, client_secret, refresh_token):
-    """
-        - Parameters:
-            - client_id: str
-            - client_secret: str
-            - refresh_token: str
-            
-        - Returns:
-            - str: access_token
-            
-        - Description:
-            - Fetches the access token from Zoho CRM using the client_id, client_secret, and refresh_token.
-    """
-    print("Fetching Zoho access token...")
-    payload = {
-        "refresh_token": refresh_token,
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "grant_type": "refresh_token"
-    }
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    response = requests.post(TOKEN_URL, data=payload, headers=headers)
+# Leads with more opens than this get a call script
+OPEN_THRESHOLD = int(os.getenv("CALL_SCRIPT_OPEN_THRESHOLD", "5"))
+# Path of the engagement event store to pick hot leads from; unset reads the tracking sheet instead
+CALL_SCRIPT_EVENT_STORE = os.getenv("CALL_SCRIPT_EVENT_STORE")
+# Only the email itself goes into the prompt; open counts and timestamps change between runs and would
+# defeat the LLM cache
+CALL_SCRIPT_FIELDS = ["Email_address", "Subject", "Email Template Body"]
 
-    try:
-        response.raise_for_status()
-        response_json = response.json()
-        if "access_token" in response_json:
-            print("Access token obtained successfully.")
-            return response_json["access_token"]
-        else:
-            raise Exception(f"Failed to get access token: {response_json.get('error', 'Unknown error')}")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Request error: {e}")
+# Authorized once per process; worksheets are cached and writes are batched
+sheets = SheetsIO('/home/fox/ai/src/credentials.json')
 
 def authorize_google_sheets():
     """
@@ -48,109 +30,175 @@ def authorize_google_sheets():
             - gspread.client.Client: client
             
         - Description:
-            - Authorizes Google Sheets using the credentials.json file.
+            - Authorizes Google Sheets using the credentials.json file (cached after the first call).
     """
     try:
-        print("Authorizing Google Sheets...")
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        credentials = ServiceAccountCredentials.from_json_keyfile_name('/home/fox/ai/src/credentials.json', scope)
-        return gspread.authorize(credentials)
+        return sheets.client
     except Exception as e:
         raise Exception(f"Error authorizing Google Sheets: {e}")
 
-def upload_to_zoho(email, call_script, access_token):
+def upload_to_zoho(call_scripts, token_manager):
     """
         - Parameters:
-            - email: str
-            - call_script: str
-            - access_token: str
+            - call_scripts: list of (email, call_script) tuples
+            - token_manager: ZohoTokenManager
             
         - Returns:
-            - None
+            - list: per-record results (email, success, action, message)
             
         - Description:
-            - Uploads the lead to Zoho CRM.
+            - Upserts the leads into Zoho CRM in batches of up to 100, matched on Email.
     """
-    url = f"{ZOHO_API_BASE_URL}/Leads"
-    headers = {
-        "Authorization": f"Zoho-oauthtoken {access_token}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "data": [{"Email": email, "Call_Script": call_script}]
-    }
-    try:
-        response = requests.post(url, json=data, headers=headers)
-        response.raise_for_status()
-        print(f"Successfully uploaded lead to Zoho CRM: {email}")
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to upload lead to Zoho CRM for {email}: {response.text}")
+    if not call_scripts:
+        return []
+    results = ZohoBulkUpserter(ZOHO_API_BASE_URL, token_manager).upsert(call_scripts)
+    succeeded = sum(1 for result in results if result["success"])
+    print(f"Successfully upserted {succeeded}/{len(results)} leads to Zoho CRM")
+    for result in results:
+        if not result["success"]:
+            print(f"Failed to upload lead to Zoho CRM for {result['email']}: {result['message']}")
+    return results
 
-def upload_to_google_sheet(email, call_script, new_sheet_id):
+def upload_to_google_sheet(call_scripts, new_sheet_id):
     """
         - Parameters:
-            - email: str
-            - call_script: str
+            - call_scripts: list of (email, call_script) tuples
             - new_sheet_id: str
             
         - Returns:
             - None
             
         - Description:
-            - Uploads the lead to the Google Sheet.
+            - Uploads the leads to the Google Sheet with a single append.
     """
-    client = authorize_google_sheets()
     try:
-        sheet = client.open_by_key(new_sheet_id).sheet1
-        first_name, last_name = (email.split('@')[0].split('.') + [""])[:2]
-        sheet.append_row([email, first_name, last_name, call_script])
-        print(f"Successfully uploaded lead to Google Sheet: {email}")
+        for email, call_script in call_scripts:
+            first_name, last_name = (email.split('@')[0].split('.') + [""])[:2]
+            sheets.append(new_sheet_id, [email, first_name, last_name, call_script])
+        written = sheets.flush(new_sheet_id)
+        print(f"Successfully uploaded {written} leads to Google Sheet")
     except Exception as e:
         print(f"Failed to upload to Google Sheet: {e}")
 
-def process_email_tracking(sheet_id, new_sheet_id):
+def select_engaged_leads(rows, open_threshold=OPEN_THRESHOLD):
+    """
+        - Parameters:
+            - rows: list of dict (tracking sheet records)
+            - open_threshold: int
+            
+        - Returns:
+            - pd.DataFrame: records with Open_Amount above the threshold, with their sheet row in `_sheet_row`
+            
+        - Description:
+            - Applies the engagement filter to the whole sheet in one vectorized pass.
+    """
+    df = pd.DataFrame(rows)
+    if df.empty or 'Open_Amount' not in df.columns:
+        return df.iloc[0:0]
+    # Row 1 is the header, so record index 0 is sheet row 2
+    df['_sheet_row'] = df.index + 2
+    open_amount = pd.to_numeric(df['Open_Amount'], errors='coerce').fillna(0)
+    return df[open_amount > open_threshold]
+
+def select_engaged_leads_from_store(sheet, event_store, open_threshold=OPEN_THRESHOLD, since=None):
+    """
+        - Parameters:
+            - sheet: gspread.Worksheet
+            - event_store: EventStore
+            - open_threshold: int
+            - since: float or None
+            
+        - Returns:
+            - pd.DataFrame: same shape as select_engaged_leads
+            
+        - Description:
+            - Picks the hot leads with an indexed event-store query, then fetches only their rows from the
+              tracking sheet (one email column read plus one batch_get) instead of every record.
+    """
+    hot = event_store.hot_leads(open_threshold, since=since)
+    if not hot:
+        return pd.DataFrame()
+
+    with get_tracer().span("sheets", operation="read_email_column"):
+        header = sheet.row_values(1)
+        emails = sheet.col_values(1)
+    row_by_email = {email: row for row, email in enumerate(emails[1:], start=2) if email}
+    rows = [row_by_email[lead["email"]] for lead in hot if lead["email"] in row_by_email]
+    missing = len(hot) - len(rows)
+    if missing:
+        print(f"{missing} hot leads are no longer on the tracking sheet, skipping them.")
+    if not rows:
+        return pd.DataFrame()
+
+    with get_tracer().span("sheets", operation="batch_get", rows=len(rows)):
+        values = sheet.batch_get([f"A{row}:{gspread.utils.rowcol_to_a1(row, len(header))}" for row in rows])
+    records = [dict(zip(header, (value[0] if value else []) + [""] * len(header))) for value in values]
+    df = pd.DataFrame(records, columns=header)
+    df['_sheet_row'] = rows
+    return df
+
+def process_email_tracking(sheet_id, new_sheet_id, open_threshold=OPEN_THRESHOLD, max_concurrency=8, event_store=None, since=None):
     """
         - Parameters:
             - sheet_id: str
             - new_sheet_id: str
+            - open_threshold: int
+            - max_concurrency: int
+            - event_store: EventStore or None
+            - since: float or None
             
         - Returns:
             - None
             
         - Description:
-            - Processes the email tracking sheet and generates call scripts.
+            - Processes the email tracking sheet and generates call scripts for every lead opened more than
+              open_threshold times, with up to max_concurrency generations in flight.
+            - With an event store, hot leads (opened since `since`, not yet scripted) come from the store
+              instead of a full read of the tracking sheet.
     """
-    client = authorize_google_sheets()
-    sheet = client.open_by_key(sheet_id).sheet1
-    rows = sheet.get_all_records()
+    sheet = sheets.worksheet(sheet_id)
+    if event_store is not None:
+        engaged = select_engaged_leads_from_store(sheet, event_store, open_threshold, since)
+    else:
+        with get_tracer().span("sheets", operation="get_all_records"):
+            rows = sheet.get_all_records()
+        engaged = select_engaged_leads(rows, open_threshold)
+    if engaged.empty:
+        print("No engaged leads to process.")
+        return
 
+    token_manager = get_token_manager(CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN, TOKEN_URL)
     try:
-        access_token = get_access_token(CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN)
+        token_manager.get_token()
+        token_manager.start_background_refresh()
     except Exception as e:
         print(f"Error obtaining access token: {e}")
         return
 
-    for index, row in enumerate(rows):
-        try:
-            email = row.get('Email_address')
-            
-            open_amount = row.get('Open_Amount', '')
-            try:
-                open_amount = int(open_amount) if open_amount else 0
-            except ValueError:
-                open_amount = 0  
-
-            # Can adjust the open amount here: 
-            if open_amount > 5:
-                # Generate the call script and upload
-                call_script = generate_call_script(row)
-                upload_to_google_sheet(email, call_script, new_sheet_id)
-                upload_to_zoho(email, call_script, access_token)
-
-                sheet.delete_rows(index + 2)  
-                print(f"Processed and removed row for: {email}")
-        except Exception as e:
-            print(f"Error processing row {index + 1}: {e}")
+    # Generate every call script concurrently, then hand them to the writers together
+    records = engaged.reindex(columns=CALL_SCRIPT_FIELDS, fill_value="").to_dict('records')
+    scripts = generate_call_scripts(records, max_concurrency=max_concurrency)
+    # Failed generations stay on the tracking sheet so the next run retries them
+    generated = engaged[[script is not None for script in scripts]]
+    call_scripts = [(email, script) for email, script in zip(engaged['Email_address'], scripts) if script is not None]
+    print(f"Generated {len(call_scripts)} call scripts ({len(engaged) - len(call_scripts)} failed).")
+
+    # Write all call scripts out in bulk, then remove the processed rows in one request
+    upload_to_google_sheet(call_scripts, new_sheet_id)
+    results = upload_to_zoho(call_scripts, token_manager)
+    # Leads Zoho rejected stay on the tracking sheet so the next run retries them
+    upserted = {result["email"] for result in results if result["success"]}
+    processed = generated[generated['Email_address'].isin(upserted)]
+    try:
+        sheets.delete_rows(sheet_id, processed['_sheet_row'].tolist())
+        print(f"Removed {len(processed)} processed rows from the tracking sheet")
+    except Exception as e:
+        print(f"Failed to remove processed rows: {e}")
+
+    if event_store is not None:
+        event_store.mark_scripted(processed['Email_address'].tolist())
+
+    get_tracer().finish(generated=len(call_scripts))
 
 if __name__ == "__main__":
     try:
@@ -159,6 +207,8 @@ if __name__ == "__main__":
         """
         source_sheet_id = email_google_sheet 
         destination_sheet_id = call_script_google_sheet 
-        process_email_tracking(source_sheet_id, destination_sheet_id)
+        # The event store is opt-in: a stale or empty store would otherwise hide every hot lead
+        event_store = EventStore(CALL_SCRIPT_EVENT_STORE) if CALL_SCRIPT_EVENT_STORE else None
+        process_email_tracking(source_sheet_id, destination_sheet_id, event_store=event_store)
     except Exception as e:
         print(f"Critical error occurred: {e}")
\ No newline at end of file
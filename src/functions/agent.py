@@ -1,93 +1,196 @@
-from langchain_core.prompts import PromptTemplate
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 import os
-from utils import set_api_key_env, get_text_from_file
-from dotenv import load_dotenv
-import os
-from langchain_openai import OpenAIEmbeddings
-from langchain.indexes.vectorstore import VectorStoreIndexWrapper
-from langchain_astradb import AstraDBVectorStore
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.messages import HumanMessage
-from langchain_core.runnables import RunnablePassthrough
-from typing import Dict
-from send_email import send_emails
-
-load_dotenv()
-
-openai_api_key = os.getenv("OPENAI_API_KEY")
-set_api_key_env("OPENAI_API_KEY", openai_api_key)
-ASTRA_DB_API_ENDPOINT = os.getenv("ASTRA_DB_API_ENDPOINT")
-ASTRA_DB_APPLICATION_TOKEN = os.getenv("ASTRA_DB_APPLICATION_TOKEN")
+import threading
+
+# Nothing here does I/O or imports the LangChain/OpenAI/Astra clients at import time.
+# Every component is built on first use by its get_* factory and cached for the process.
+
 ASTRA_DB_KEYSPACE = "default_keyspace"
+ASTRA_COLLECTION_NAME = "astra_vector_langchain"
+CHAT_MODEL = "gpt-4o"
+EMBEDDING_MODEL = "text-embedding-3-small"
+PROMPT_PATH = "prompt.md"
+# k is the number of chunks to retrieve
+RETRIEVER_K = 4
+# Chunks fetched per query for the context packer, which dedupes and trims them to the token budget
+RETRIEVER_FETCH_K = 8
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+# "astra" (default) or "local" for the embedded index built by build_local_index.py
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "astra")
 
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=openai_api_key)
+USER_PROMPT = "Write an email with provided instructions and to the following people based on the instructions provided. You will also recieve context, however, at times the context will be empty. Here is the context: {context}"
 
-llm = ChatOpenAI(model="gpt-4o")
+_instances = {}
+_lock = threading.RLock()
 
-prompt = get_text_from_file("prompt.md")
 
-prompt_template = ChatPromptTemplate([
-    ("system", prompt),
-    ("user", "Write an email with provided instructions and to the following people based on the instructions provided. You will also recieve context, however, at times the context will be empty. Here is the context: {context}"),
-])
+def _get(name, factory):
+    with _lock:
+        if name not in _instances:
+            _instances[name] = factory()
+        return _instances[name]
 
 
+def override(**components):
+    """
+        - Parameters:
+            - components: name=instance pairs (llm, embeddings, vector_store, email_agent, ...)
 
-embedding = OpenAIEmbeddings(openai_api_key=openai_api_key)
-email_agent = prompt_template | llm
+        - Description:
+            - Replaces components before (or after) first use, e.g. with local fakes in benchmarks.
+    """
+    with _lock:
+        _instances.update(components)
 
 
+def reset():
+    with _lock:
+        _instances.clear()
 
-def parse_retriever_input(params: Dict):
-    return params["messages"][-1].content
 
-vector_store = AstraDBVectorStore(
-    collection_name="astra_vector_langchain",
-    embedding=embeddings,
-    api_endpoint=ASTRA_DB_API_ENDPOINT,
-    token=ASTRA_DB_APPLICATION_TOKEN,
-    namespace=ASTRA_DB_KEYSPACE,
-)
-# k is the number of chunks to retrieve
-retriever = vector_store.as_retriever(k=4)
-
-docs = retriever.invoke("Hashim, Nadeem, hashim@cosmosys.co, CDO, Cosmosys \n Existing customers: Yahya, Qureshi, yahya@ok.co, CEO, ok")
-document_chain = create_stuff_documents_chain(llm, prompt_template)
-
-print("Documents retrieved: ",docs)
-"""
-print(document_chain.invoke(
-    {
-        "context": docs,
-        "messages": [
-            HumanMessage(content="FIRST NAME: Hashim\n,SEOND NAME: Nadeem\n, EMAIL: hashim@cosmosys.co \n, TITLE: CDO\n, COMPANY: Cosmosys \n Existing customers: FIRST NAME: Yahya\n, SECOND NAME: Qureshi \n, EMAIL: yahya@ok.co\n, TITLE: CEO\n, COMAPNY NAME: ok\n")
-        ],
-    }
-))
-"""
-
-"""
-retrieval_chain = RunnablePassthrough.assign(
-    context=parse_retriever_input | retriever,
-).assign(
-    answer=document_chain,
-)
-
-retrieval_chain.invoke(
-    {
-        "messages": [
-            HumanMessage(content="FIRST NAME: Hashim\n,SEOND NAME: Nadeem\n, EMAIL: hashim@cosmosys.co \n, TITLE: CDO\n, COMPANY: Cosmosys \n Existing customers: FIRST NAME: Yahya\n, SECOND NAME: Qureshi \n, EMAIL: yahya@ok.co\n, TITLE: CEO\n, COMAPNY NAME: ok\n")
-        ],
+def _load_settings():
+    from dotenv import load_dotenv
+    from helpers.utils import set_api_key_env
+    load_dotenv()
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    set_api_key_env("OPENAI_API_KEY", openai_api_key)
+    return {
+        "openai_api_key": openai_api_key,
+        "astra_db_api_endpoint": os.getenv("ASTRA_DB_API_ENDPOINT"),
+        "astra_db_application_token": os.getenv("ASTRA_DB_APPLICATION_TOKEN"),
     }
-)
-"""
-# convert docs list to string
-context = "\n".join(docs)
-#email = retriever.query("Hashim, Nadeem, hashim@cosmosys.co, CDO, Cosmosys \n Existing customers: Yahya, Qureshi, yahya@ok.co, CEO, ok", llm=email_agent).strip()
-email = email_agent.invoke("context: {context} \n FIRST NAME: Hashim\n,SEOND NAME: Nadeem\n, EMAIL: hashim@cosmosys.co \n, TITLE: CDO\n, COMPANY: Cosmosys \n Existing customers: FIRST NAME: Yahya\n, SECOND NAME: Qureshi \n, EMAIL: yahya@ok.co\n, TITLE: CEO\n, COMAPNY NAME: ok\n")
-# print(email)
-print(email.content)
-
-send_emails(0,5)
\ No newline at end of file
+
+
+def get_settings():
+    return _get("settings", _load_settings)
+
+
+def get_llm():
+    def build():
+        from langchain_openai import ChatOpenAI
+        get_settings()
+        return ChatOpenAI(model=CHAT_MODEL)
+    return _get("llm", build)
+
+
+def get_embeddings():
+    def build():
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=EMBEDDING_MODEL, api_key=get_settings()["openai_api_key"])
+    return _get("embeddings", build)
+
+
+def get_prompt_template():
+    def build():
+        from langchain_core.prompts import ChatPromptTemplate
+        from helpers.utils import get_text_from_file
+        return ChatPromptTemplate([
+            ("system", get_text_from_file(PROMPT_PATH)),
+            ("user", USER_PROMPT),
+        ])
+    return _get("prompt_template", build)
+
+
+def get_prompt_version():
+    """
+        - Returns:
+            - str: short hash of the system prompt, user prompt and chat model; changes when any of them does
+    """
+    def build():
+        import hashlib
+        from helpers.utils import get_text_from_file
+        material = "\x00".join([get_text_from_file(PROMPT_PATH), USER_PROMPT, CHAT_MODEL])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+    return _get("prompt_version", build)
+
+
+def get_email_agent():
+    """
+        - Returns:
+            - CachedAgent: prompt_template | llm behind the LLM response cache, with tracing callbacks
+    """
+    def build():
+        from helpers.llm_cache import CachedAgent, get_llm_cache
+        from helpers.tracing import tracing_callbacks
+        return CachedAgent(get_prompt_template(), get_llm(), get_llm_cache(), callbacks=tracing_callbacks("llm_email"), stage="llm_email")
+    return _get("email_agent", build)
+
+
+def get_vector_store():
+    """
+        - Returns:
+            - VectorStore: AstraDBVectorStore, or the local memory-mapped index when VECTOR_STORE_BACKEND=local
+    """
+    def build():
+        if VECTOR_STORE_BACKEND == "local":
+            from helpers.local_index import LocalVectorIndex, DEFAULT_LOCAL_INDEX_PATH
+            return LocalVectorIndex(DEFAULT_LOCAL_INDEX_PATH, embedding=get_embeddings())
+
+        from langchain_astradb import AstraDBVectorStore
+        settings = get_settings()
+        return AstraDBVectorStore(
+            collection_name=ASTRA_COLLECTION_NAME,
+            embedding=get_embeddings(),
+            api_endpoint=settings["astra_db_api_endpoint"],
+            token=settings["astra_db_application_token"],
+            namespace=ASTRA_DB_KEYSPACE,
+        )
+    return _get("vector_store", build)
+
+
+def get_retriever():
+    def build():
+        from helpers.tracing import tracing_callbacks
+        return get_vector_store().as_retriever(k=RETRIEVER_K).with_config(callbacks=tracing_callbacks())
+    return _get("retriever", build)
+
+
+def get_batch_retriever():
+    """
+        - Returns:
+            - BatchRetriever: batched retrieval for many prospects (one embedding call per chunk, concurrent searches)
+    """
+    def build():
+        from helpers.retrieval import BatchRetriever
+        return BatchRetriever(get_vector_store(), get_embeddings(), k=RETRIEVER_K)
+    return _get("batch_retriever", build)
+
+
+def get_context_packer():
+    """
+        - Returns:
+            - ContextPacker: dedupes, ranks and trims retrieved chunks to CONTEXT_TOKEN_BUDGET tokens
+    """
+    def build():
+        from helpers.context_packing import ContextPacker
+        return ContextPacker(token_budget=CONTEXT_TOKEN_BUDGET)
+    return _get("context_packer", build)
+
+
+def retrieve_contexts(queries):
+    """
+        - Parameters:
+            - queries: list of str
+
+        - Returns:
+            - list: one packed prompt context per query, in input order
+    """
+    return get_context_packer().pack_many(queries, get_batch_retriever(), k=RETRIEVER_FETCH_K)
+
+
+_FACTORIES = {
+    "llm": get_llm,
+    "embeddings": get_embeddings,
+    "prompt_template": get_prompt_template,
+    "email_agent": get_email_agent,
+    "vector_store": get_vector_store,
+    "retriever": get_retriever,
+    "batch_retriever": get_batch_retriever,
+    "context_packer": get_context_packer,
+}
+
+
+def __getattr__(name):
+    # Keeps `from helpers.agent import email_agent` working; the component is built on first access
+    if name in _FACTORIES:
+        return _FACTORIES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
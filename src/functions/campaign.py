@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from helpers.create_email import generate_email_for_prospect, manifest_prompt_version, retrieve_for_chunk
+from helpers.job_queue import JobQueue, DEFAULT_QUEUE_PATH, DEFAULT_LEASE_SECONDS
+from helpers.manifest import CampaignManifest
+from helpers.prospect_stream import iter_prospect_chunks, read_domain_index, DEFAULT_CHUNK_SIZE
+from helpers.rate_limiter import RateLimiter, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+from helpers.tracing import get_tracer
+
+# Seconds an idle worker waits before polling again while other workers still hold leases
+POLL_INTERVAL = 2.0
+# Replacements started per worker slot before a crashing slot is given up on
+MAX_WORKER_RESTARTS = 3
+
+
+def load_queue(queue, prospects_path="data/prospects.csv", chunk_size=DEFAULT_CHUNK_SIZE, manifest=None):
+    """
+        - Parameters:
+            - queue: JobQueue
+            - prospects_path: str
+            - chunk_size: int
+            - manifest: CampaignManifest or None
+
+        - Returns:
+            - int: number of prospects queued
+
+        - Description:
+            - Without a manifest, already queued emails are skipped. With one, only new or changed
+              prospects (or those generated with another prompt version) are queued, and changed ones
+              that were queued before are reset and their old result dropped, so they are regenerated.
+    """
+    chunk_filter = None
+    if manifest is not None:
+        prompt_version = manifest_prompt_version()
+        chunk_filter = lambda chunk: manifest.filter_changed(chunk, prompt_version)
+    queued = 0
+    for chunk in iter_prospect_chunks(prospects_path, chunk_size, chunk_filter=chunk_filter):
+        queued += queue.enqueue(chunk.to_dict("records"), requeue=manifest is not None)
+    return queued
+
+
+def run_worker(worker_id, queue_path=DEFAULT_QUEUE_PATH, batch_size=64, max_concurrency=8, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, lease_seconds=DEFAULT_LEASE_SECONDS, manifest_path=None):
+    """
+        - Parameters:
+            - worker_id: str
+            - queue_path: str
+            - batch_size: int
+            - max_concurrency: int
+            - requests_per_minute: int (this worker's share of the API quota)
+            - tokens_per_minute: int (this worker's share of the API quota)
+            - lease_seconds: float
+            - manifest_path: str or None (record committed results in this campaign manifest)
+
+        - Returns:
+            - int: number of emails this worker committed
+
+        - Description:
+            - Leases batches until the queue is drained, running the same batched retrieval and generation
+              as create_email, and commits each batch's results while its leases are kept alive.
+    """
+    queue = JobQueue(queue_path, lease_seconds=lease_seconds)
+    manifest = CampaignManifest(manifest_path) if manifest_path else None
+    prompt_version = manifest_prompt_version() if manifest is not None else None
+    zoho_domains = read_domain_index("data/zoho_emails.csv")
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    committed = 0
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while True:
+            records = queue.lease(worker_id, batch_size)
+            if not records:
+                if queue.remaining() == 0:
+                    break
+                # Other workers hold the rest; wait in case one of them crashes and its leases expire
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            emails = [record["Email"] for record in records]
+            with queue.keep_alive(worker_id, emails):
+                retrieved = retrieve_for_chunk(records, zoho_domains)
+                results = [
+                    result for result in executor.map(lambda pair: generate_email_for_prospect(pair[0], pair[1], limiter), retrieved)
+                    if result is not None
+                ]
+            generated = {result["Email_address"] for result in results}
+            queue.complete(worker_id, results, failed=[email for email in emails if email not in generated])
+            if manifest is not None:
+                # Prospects queued without a manifest carry no Content_Hash and are not recorded
+                manifest.record(results, {record["Email"]: record.get("Content_Hash") for record in records}, prompt_version)
+            committed += len(results)
+
+    print(f"Worker {worker_id} finished: {committed} emails committed.")
+    get_tracer().finish(generated=committed)
+    queue.close()
+    if manifest is not None:
+        manifest.close()
+    return committed
+
+
+def _worker_main(worker_id, options):
+    run_worker(worker_id, **options)
+
+
+def run_campaign(workers=4, queue_path=DEFAULT_QUEUE_PATH, prospects_path="data/prospects.csv", output_path="data/generated_emails.csv", batch_size=64, max_concurrency=8, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, lease_seconds=DEFAULT_LEASE_SECONDS, load=True, manifest_path=None):
+    """
+        - Parameters:
+            - workers: int (worker processes started on this host)
+            - queue_path: str
+            - prospects_path: str
+            - output_path: str
+            - batch_size: int
+            - max_concurrency: int (threads per worker)
+            - requests_per_minute: int (total quota, split evenly between this host's workers)
+            - tokens_per_minute: int (total quota, split evenly between this host's workers)
+            - lease_seconds: float
+            - load: bool (enqueue prospects_path first)
+            - manifest_path: str or None (queue only new or changed prospects and record results in this
+              campaign manifest)
+
+        - Returns:
+            - str: path of the generated emails CSV exported from the queue
+
+        - Description:
+            - Loads the prospects into the job queue and runs `workers` processes against it.
+              A worker that exits abnormally while work remains is replaced; its leases expire and
+              are picked up by the others.
+            - Other hosts can join by running campaign_runner.py work against the same queue file.
+    """
+    queue = JobQueue(queue_path, lease_seconds=lease_seconds)
+    if load:
+        manifest = CampaignManifest(manifest_path) if manifest_path else None
+        print(f"Queued {load_queue(queue, prospects_path, manifest=manifest)} new prospects.")
+        if manifest is not None:
+            manifest.close()
+
+    options = {
+        "queue_path": queue_path,
+        "batch_size": batch_size,
+        "max_concurrency": max_concurrency,
+        "requests_per_minute": max(1, requests_per_minute // workers),
+        "tokens_per_minute": max(1, tokens_per_minute // workers),
+        "lease_seconds": lease_seconds,
+        "manifest_path": manifest_path
+    }
+    context = multiprocessing.get_context("spawn")
+    host = socket.gethostname()
+
+    def start(index, generation=0):
+        process = context.Process(target=_worker_main, args=(f"{host}-{os.getpid()}-{index}.{generation}", options), daemon=False)
+        process.start()
+        return process
+
+    processes = {index: (start(index), 0) for index in range(workers)}
+    while processes:
+        time.sleep(POLL_INTERVAL)
+        for index, (process, generation) in list(processes.items()):
+            if process.is_alive():
+                continue
+            del processes[index]
+            if process.exitcode != 0 and queue.remaining() and generation < MAX_WORKER_RESTARTS:
+                print(f"Worker {index} exited with code {process.exitcode}; starting a replacement.")
+                processes[index] = (start(index, generation + 1), generation + 1)
+
+    counts = queue.counts()
+    print(f"Campaign finished: {counts.get('done', 0)} done, {counts.get('failed', 0)} failed.")
+    queue.export(output_path)
+    queue.close()
+    return output_path
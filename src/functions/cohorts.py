@@ -0,0 +1,111 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# (bucket, keywords) checked in order; the first bucket with a keyword matching a whole word of the title
+# (optionally plural) wins. Keywords are regexes: "president" skips "vice president", which is a director title
+TITLE_BUCKETS = [
+    ("executive", ["chief", "ceo", "cfo", "coo", "cdo", "cto", "cio", r"(?<!vice )president", "founder", "owner", "partner"]),
+    ("finance", ["finance", "financial", "billing", "revenue", "account", "accounting", "accountant", "controller", "payment"]),
+    ("operations", ["operation", "operational", "practice", r"administrat\w*", "office"]),
+    ("clinical", ["physician", "doctor", "nurse", "clinical", "medical", "md", "dds"]),
+    ("director", ["director", "vp", "vice president", "head"]),
+    ("manager", ["manager", "lead", "supervisor", "coordinator"]),
+]
+DEFAULT_TITLE_BUCKET = "other"
+DEFAULT_COHORT_VARIANTS = 2
+# Templates kept in memory; evicted cohorts are regenerated from the LLM cache
+MAX_CACHED_COHORTS = 10000
+
+
+def title_buckets(titles):
+    """
+        - Parameters:
+            - titles: pd.Series of str
+
+        - Returns:
+            - np.ndarray: normalized title bucket per row (e.g. 'executive', 'finance', 'other')
+
+        - Description:
+            - Vectorized: one str.contains per bucket over the lower-cased column; keywords match whole
+              words, so "coordinator" is not "coo" and "mdm" is not "md".
+    """
+    normalized = titles.fillna("").str.lower()
+    conditions = [
+        normalized.str.contains(r"\b(?:" + "|".join(keywords) + r")s?\b", regex=True).to_numpy(dtype=bool)
+        for _, keywords in TITLE_BUCKETS
+    ]
+    return np.select(conditions, [bucket for bucket, _ in TITLE_BUCKETS], default=DEFAULT_TITLE_BUCKET)
+
+
+def assign_cohorts(prospects, zoho_domains):
+    """
+        - Parameters:
+            - prospects: pd.DataFrame (normalized chunk from iter_prospect_chunks, with Domain_Match when
+              already resolved by DomainIndex.match_domains)
+            - zoho_domains: DomainIndex
+
+        - Returns:
+            - pd.DataFrame: prospects with Zoho_Match, Title_Bucket and Cohort columns added
+
+        - Description:
+            - A cohort is (Zoho match flag, domain, title bucket): prospects in one cohort get the same
+              retrieval query and therefore the same context, so they can share one generated template.
+    """
+    if "Domain_Match" not in prospects.columns:
+        prospects = zoho_domains.match_domains(prospects)
+    matched = prospects["Domain_Match"].astype(bool)
+    buckets = title_buckets(prospects["Title"])
+    cohorts = matched.map({True: "match", False: "new"}) + "|" + prospects["Domain"] + "|" + buckets
+    return prospects.assign(Zoho_Match=matched, Title_Bucket=buckets, Cohort=cohorts.astype(str))
+
+
+def variant_for(email, variants):
+    """
+        - Parameters:
+            - email: str
+            - variants: int
+
+        - Returns:
+            - int: stable variant index, so a prospect always receives the same template variant
+    """
+    if variants <= 1:
+        return 0
+    return int.from_bytes(hashlib.md5(email.lower().encode("utf-8")).digest()[:4], "big") % variants
+
+
+class CohortTemplates:
+    """
+        - Parameters:
+            - max_cohorts: int
+
+        - Description:
+            - Thread-safe, size-bounded LRU of cohort -> list of placeholder template variants.
+    """
+
+    def __init__(self, max_cohorts=MAX_CACHED_COHORTS):
+        self.max_cohorts = max_cohorts
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cohort):
+        with self._lock:
+            templates = self._templates.get(cohort)
+            if templates is not None:
+                self._templates.move_to_end(cohort)
+            return templates
+
+    def put(self, cohort, templates):
+        with self._lock:
+            self._templates[cohort] = templates
+            self._templates.move_to_end(cohort)
+            while len(self._templates) > self.max_cohorts:
+                self._templates.popitem(last=False)
+
+    def __contains__(self, cohort):
+        with self._lock:
+            return cohort in self._templates
+
+    def __len__(self):
+        return len(self._templates)
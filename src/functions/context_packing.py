@@ -0,0 +1,178 @@
+import re
+import threading
+from collections import OrderedDict
+from helpers.rate_limiter import estimate_tokens
+from helpers.tracing import get_tracer
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 1200
+# Chunks whose word-shingle Jaccard similarity reaches this are treated as duplicates
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+# A trimmed tail chunk shorter than this is dropped rather than sent as a fragment
+MIN_CHUNK_TOKENS = 48
+DEFAULT_PACKED_CACHE_SIZE = 20000
+SHINGLE_WORDS = 3
+CHUNK_SEPARATOR = "\n\n---\n\n"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+def _get_encoding():
+    # tiktoken ships with langchain_openai; fall back to the ~4 characters/token estimate without it
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                _encoding = False
+        return _encoding
+
+
+def count_tokens(text):
+    """
+        - Parameters:
+            - text: str
+
+        - Returns:
+            - int: tokens of `text` for gpt-4o (estimated when tiktoken is unavailable)
+    """
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode_ordinary(text))
+    return estimate_tokens(text)
+
+
+def truncate_tokens(text, max_tokens):
+    """
+        - Parameters:
+            - text: str
+            - max_tokens: int
+
+        - Returns:
+            - str: the longest prefix of `text` within max_tokens
+    """
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode_ordinary(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def _shingles(text):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)}
+    return {" ".join(words[index:index + SHINGLE_WORDS]) for index in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _page_content(doc):
+    return doc.page_content if hasattr(doc, "page_content") else str(doc)
+
+
+def dedupe_chunks(hits, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """
+        - Parameters:
+            - hits: list of (Document or str, score) pairs, best first
+            - threshold: float
+
+        - Returns:
+            - list: hits with exact and near-duplicate chunks removed (the higher-ranked copy is kept)
+    """
+    kept = []
+    kept_shingles = []
+    for doc, score in hits:
+        shingles = _shingles(_page_content(doc))
+        if any(len(shingles & other) >= threshold * len(shingles | other) for other in kept_shingles):
+            continue
+        kept.append((doc, score))
+        kept_shingles.append(shingles)
+    return kept
+
+
+class ContextPacker:
+    """
+        - Parameters:
+            - token_budget: int
+            - similarity_threshold: float
+            - cache_size: int
+
+        - Description:
+            - Turns retrieved (Document, score) hits into one prompt context: ranks by score, drops
+              near-duplicate chunks and fills `token_budget` tokens, trimming the last chunk to fit.
+            - Packed contexts are cached by retrieval query (LRU), so repeated queries skip retrieval.
+    """
+
+    def __init__(self, token_budget=DEFAULT_CONTEXT_TOKEN_BUDGET, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD, cache_size=DEFAULT_PACKED_CACHE_SIZE):
+        self.token_budget = token_budget
+        self.similarity_threshold = similarity_threshold
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pack(self, hits):
+        """
+            - Parameters:
+                - hits: list of (Document, score) pairs, or plain Documents in rank order
+
+            - Returns:
+                - str: packed context within token_budget
+        """
+        hits = [hit if isinstance(hit, tuple) else (hit, -rank) for rank, hit in enumerate(hits)]
+        hits = sorted(hits, key=lambda hit: hit[1], reverse=True)
+        separator_tokens = count_tokens(CHUNK_SEPARATOR)
+
+        parts = []
+        remaining = self.token_budget
+        for doc, _ in dedupe_chunks(hits, self.similarity_threshold):
+            text = _page_content(doc).strip()
+            if parts:
+                remaining -= separator_tokens
+            tokens = count_tokens(text)
+            if tokens > remaining:
+                if remaining >= MIN_CHUNK_TOKENS:
+                    parts.append(truncate_tokens(text, remaining))
+                break
+            parts.append(text)
+            remaining -= tokens
+        return CHUNK_SEPARATOR.join(parts)
+
+    def _get_cached(self, query):
+        with self._lock:
+            context = self._cache.get(query)
+            if context is not None:
+                self._cache.move_to_end(query)
+            return context
+
+    def _put_cached(self, query, context):
+        with self._lock:
+            self._cache[query] = context
+            self._cache.move_to_end(query)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def pack_many(self, queries, retriever, k=None):
+        """
+            - Parameters:
+                - queries: list of str (duplicates allowed)
+                - retriever: BatchRetriever
+                - k: int or None (chunks fetched per query before deduplication and trimming)
+
+            - Returns:
+                - list: one packed context per query, in input order
+        """
+        contexts = {}
+        missing = []
+        for query in dict.fromkeys(queries):
+            context = self._get_cached(query)
+            if context is None:
+                missing.append(query)
+            else:
+                contexts[query] = context
+        get_tracer().record("context_cache", 0.0, cache_hit=bool(contexts), hits=len(contexts), misses=len(missing))
+
+        if missing:
+            for query, hits in zip(missing, retriever.retrieve_many(missing, k=k, with_scores=True)):
+                contexts[query] = self.pack(hits)
+                self._put_cached(query, contexts[query])
+        return [contexts[query] for query in queries]
@@ -1,38 +1,90 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 import os
-from dotenv import load_dotenv
-from helpers.utils import set_api_key_env
+import threading
+from helpers.llm_cache import CachedAgent, get_llm_cache
+from helpers.tracing import tracing_callbacks
 
-# Load environment variables and API keys
-load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
-set_api_key_env("OPENAI_API_KEY", openai_api_key)
+CALL_SCRIPT_MODEL = "gpt-4o"
+CALL_SCRIPT_SYSTEM_PROMPT = "You are a professional sales assistant. Generate **only a short opening line** for a cold sales call that grabs the user's attention and sets a positive tone. Keep it to 3-4 lines max."
+CALL_SCRIPT_USER_PROMPT = "Here is the email content: {email_content}. Generate a persuasive and concise call script for the sales representative."
 
-llm = ChatOpenAI(model="gpt-4o")
+# Built on first use by get_call_script_agent(); assign a CachedAgent here to override it
+call_script_agent = None
+_agent_lock = threading.Lock()
 
-call_script_prompt_template = ChatPromptTemplate([
-    ("system", "You are a professional sales assistant. Generate **only a short opening line** for a cold sales call that grabs the user's attention and sets a positive tone. Keep it to 3-4 lines max."),
-    ("user", "Here is the email content: {email_content}. Generate a persuasive and concise call script for the sales representative.")
-])
+def get_call_script_agent():
+    """
+        - Returns:
+            - CachedAgent: call script prompt | llm behind the LLM response cache
 
-call_script_agent = call_script_prompt_template | llm
+        - Description:
+            - Loads API keys and builds the chat model on first call, so importing this module does no I/O.
+    """
+    global call_script_agent
+    with _agent_lock:
+        if call_script_agent is None:
+            from dotenv import load_dotenv
+            from langchain_core.prompts import ChatPromptTemplate
+            from langchain_openai import ChatOpenAI
+            from helpers.utils import set_api_key_env
 
-def generate_call_script(email_content: str) -> str:
+            # Load environment variables and API keys
+            load_dotenv()
+            set_api_key_env("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY"))
+
+            call_script_prompt_template = ChatPromptTemplate([
+                ("system", CALL_SCRIPT_SYSTEM_PROMPT),
+                ("user", CALL_SCRIPT_USER_PROMPT)
+            ])
+            call_script_agent = CachedAgent(
+                call_script_prompt_template, ChatOpenAI(model=CALL_SCRIPT_MODEL), get_llm_cache(),
+                callbacks=tracing_callbacks("llm_call_script"), stage="llm_call_script"
+            )
+        return call_script_agent
+
+def generate_call_script(email_content: str, refresh: bool = False) -> str:
     """
         - Parameters:
             - email_content: str
+            - refresh: bool
             
         - Returns:
             - str: call_script
             
         - Description:
             - Generates a call script based on the email content.
+            - Repeated requests are served from the LLM cache unless refresh is True.
     """
     try:
         # Invoke the model and get the response
-        response = call_script_agent.invoke({"email_content": email_content})
+        response = get_call_script_agent().invoke({"email_content": email_content}, refresh=refresh)
         return response.content
     except Exception as e:
         print(f"Error generating call script: {e}")
         return "An error occurred while generating the call script."
+
+def generate_call_scripts(email_contents: list, max_concurrency: int = 8, refresh: bool = False) -> list:
+    """
+        - Parameters:
+            - email_contents: list
+            - max_concurrency: int
+            - refresh: bool
+            
+        - Returns:
+            - list: call_scripts in input order, None where generation failed
+            
+        - Description:
+            - Generates call scripts for many leads with at most max_concurrency requests in flight.
+    """
+    responses = get_call_script_agent().batch(
+        [{"email_content": email_content} for email_content in email_contents],
+        max_concurrency=max_concurrency,
+        refresh=refresh
+    )
+    call_scripts = []
+    for response in responses:
+        if isinstance(response, Exception):
+            print(f"Error generating call script: {response}")
+            call_scripts.append(None)
+        else:
+            call_scripts.append(response.content)
+    return call_scripts
@@ -1,73 +1,328 @@
-import pandas as pd
-import time
-from helpers.agent import email_agent, retriever
-
-def create_email():
-    """
-        - Parameters: 
-            - None
-        
-        - Returns: 
-            - DataFrame
-        
-        - Description:  
-            This function generates personalized email templates for each prospect in the prospects.csv file.
+from concurrent.futures import ThreadPoolExecutor
+from helpers.agent import get_email_agent, get_prompt_version, retrieve_contexts
+from helpers.domain_index import domain_of
+from helpers.output_writer import StreamingEmailWriter
+from helpers.cohorts import CohortTemplates, assign_cohorts, variant_for, DEFAULT_COHORT_VARIANTS
+from helpers.prospect_stream import iter_prospects, iter_prospect_chunks, read_domain_index, DEFAULT_CHUNK_SIZE, DEFAULT_COMPANY, DEFAULT_TITLE
+from helpers.rate_limiter import RateLimiter, estimate_tokens, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+
+# Expected completion size of one email body, used to reserve TPM capacity up front.
+EXPECTED_COMPLETION_TOKENS = 400
+
+def prospect_fields(row):
+    """
+        - Parameters:
+            - row: dict
+
+        - Returns:
+            - tuple: email, first_name, last_name, company_name, title with defaults applied
+    """
+    company_name = row.get("Company") or DEFAULT_COMPANY
+    title = row.get("Title") or DEFAULT_TITLE
+    return row["Email"], row.get("First Name") or "", row.get("Last Name") or "", company_name, title
+
+def personalize(body, first_name, company_name, title):
+    """
+        - Parameters:
+            - body: str (generated body, possibly containing [First Name], [Company Name] and [Title])
+            - first_name: str
+            - company_name: str
+            - title: str
+
+        - Returns:
+            - str: HTML-ready body with the placeholders filled in
+    """
+    return (
+        body
+        .replace("\n", "<br>")
+        .replace("[First Name]", first_name)
+        .replace("[Company Name]", company_name)
+        .replace("[Title]", title)
+    )
+
+def manifest_prompt_version(cohorts=False):
+    """
+        - Returns:
+            - str: prompt version recorded in the campaign manifest; cohort output differs from
+              per-prospect output, so the mode is part of the version
+    """
+    return f"{get_prompt_version()}:{'cohort' if cohorts else 'prospect'}"
+
+def build_retrieval_query(row, zoho_domains):
+    """
+        - Parameters:
+            - row: dict (with Domain_Match when the chunk went through DomainIndex.match_domains)
+            - zoho_domains: DomainIndex
+
+        - Returns:
+            - str: the retriever query for this prospect
     """
-    # Load the prospects CSV
-    prospects = pd.read_csv("data/prospects.csv")
-    zoho_emails = pd.read_csv("data/zoho_emails.csv")['Email'].tolist()
-    zoho_domains = [email.split('@')[1] for email in zoho_emails]
+    email, first_name, last_name, company_name, title = prospect_fields(row)
+    matched = row.get("Domain_Match")
+    if matched is None:
+        matched = (row.get("Domain") or domain_of(email)) in zoho_domains
 
-    mail_df = pd.DataFrame(columns=["Email_address", "Subject", "Email Template Body"])
+    # Check if the email needs personalization
+    if matched:
+        return (
+            f"{first_name}, {last_name}, {email}, {title}, {company_name}\n"
+            f"A sister company using our service has been identified."
+        )
+    return f"{email}\nWe have success stories to share, and we'd love to collaborate with you!"
 
-    for _, row in prospects.iterrows():
+def generate_email_for_prospect(row, context, limiter=None):
+    """
+        - Parameters:
+            - row: dict
+            - context: str (packed retrieval context)
+            - limiter: RateLimiter or None
+
+        - Returns:
+            - dict: Email_address, Subject and Email Template Body, or None on failure
+
+        - Description:
+            - Generates a personalized email for a single prospect from its packed context.
+    """
+    email = row.get("Email")
+    try:
+        email, first_name, last_name, company_name, title = prospect_fields(row)
+
+        generated_subject = f"Enhancing Healthcare Operations for {first_name} at {company_name}"
+
+        # Generate personalized email body using the AI agent
+        message = f"context: {context}, Generate a personalized email body for {first_name}."
+        estimated = estimate_tokens(message) + EXPECTED_COMPLETION_TOKENS
+        generated_response = get_email_agent().invoke(message, limiter=limiter, estimated_tokens=estimated)
+
+        usage = getattr(generated_response, "usage_metadata", None)
+        if limiter is not None and usage:
+            limiter.record_usage(estimated, usage.get("total_tokens", estimated))
+
+        generated_body = personalize(generated_response.content, first_name, company_name, title)
+
+        return {
+            "Email_address": email,
+            "Subject": generated_subject,
+            "Email Template Body": generated_body
+        }
+
+    except Exception as e:
+        print(f"Error processing {email}: {e}")
+        return None
+
+def retrieve_for_chunk(records, zoho_domains):
+    """
+        - Parameters:
+            - records: list of dict
+            - zoho_domains: DomainIndex
+
+        - Returns:
+            - list: (row, context) pairs for every prospect whose retrieval succeeded
+
+        - Description:
+            - Builds the queries for a chunk of prospects and resolves them with one batched retrieval,
+              packed into token-budgeted contexts.
+    """
+    queries = []
+    valid = []
+    for row in records:
         try:
-            email = row["Email"]
-            first_name = row["First Name"]
-            last_name = row["Last Name"]
-            company_name = row["Company"] if pd.notna(row["Company"]) else "your organization"
-            title = row["Title"] if pd.notna(row["Title"]) else "your team"
-            target_domain = email.split('@')[1]
-
-            generated_subject = f"Enhancing Healthcare Operations for {first_name} at {company_name}"
-            
-            # Check if the email needs personalization
-            if target_domain in zoho_domains:
-                docs = retriever.invoke(
-                    f"{first_name}, {last_name}, {email}, {title}, {company_name}\n"
-                    f"A sister company using our service has been identified."
-                )
-            else:
-                docs = retriever.invoke(
-                    f"{email}\nWe have success stories to share, and we'd love to collaborate with you!"
-                )
-
-            # Generate personalized email body using the AI agent
-            context = "\n".join(docs)
-            generated_response = email_agent.invoke(
-                f"context: {context}, Generate a personalized email body for {first_name}."
-            )
-
-            generated_body = (
-                generated_response.content
-                .replace("\n", "<br>")
-                .replace("[First Name]", first_name)
-                .replace("[Company Name]", company_name)
-                .replace("[Title]", title)
-            )
-
-            mail_df = pd.concat([mail_df, pd.DataFrame({
-                "Email_address": [email],
-                "Subject": [generated_subject],
-                "Email Template Body": [generated_body]
-            })])
-
-            # Prevent hitting rate limits
-            time.sleep(2)
+            queries.append(build_retrieval_query(row, zoho_domains))
+            valid.append(row)
+        except Exception as e:
+            print(f"Error processing {row.get('Email')}: {e}")
+    try:
+        return list(zip(valid, retrieve_contexts(queries)))
+    except Exception as e:
+        print(f"Error retrieving context for {len(queries)} prospects: {e}")
+        return []
 
+def build_cohort_query(row):
+    """
+        - Parameters:
+            - row: dict (first member of the cohort, with Zoho_Match and Title_Bucket)
+
+        - Returns:
+            - str: retrieval query shared by every member of the cohort (no per-person fields)
+    """
+    if row["Zoho_Match"]:
+        return (
+            f"{row['Title_Bucket']}, {row['Company']}, {row['Domain']}\n"
+            f"A sister company using our service has been identified."
+        )
+    return f"{row['Domain']}\nWe have success stories to share, and we'd love to collaborate with you!"
+
+def generate_cohort_template(row, context, variant, variants, limiter=None):
+    """
+        - Parameters:
+            - row: dict (first member of the cohort)
+            - context: str (packed retrieval context)
+            - variant: int
+            - variants: int
+            - limiter: RateLimiter or None
+
+        - Returns:
+            - str: email body with [First Name], [Company Name] and [Title] placeholders, or None on failure
+    """
+    try:
+        message = (
+            f"context: {context}, Generate a personalized email body for a {row['Title_Bucket']} contact. "
+            f"Address the reader as [First Name], refer to their organization as [Company Name] and their role as [Title]; "
+            f"keep these placeholders verbatim. This is variant {variant + 1} of {variants}."
+        )
+        estimated = estimate_tokens(message) + EXPECTED_COMPLETION_TOKENS
+        generated_response = get_email_agent().invoke(message, limiter=limiter, estimated_tokens=estimated)
+
+        usage = getattr(generated_response, "usage_metadata", None)
+        if limiter is not None and usage:
+            limiter.record_usage(estimated, usage.get("total_tokens", estimated))
+        return generated_response.content
+    except Exception as e:
+        print(f"Error generating template for cohort {row.get('Cohort')}: {e}")
+        return None
+
+def prepare_cohort_templates(members, templates, executor, variants, limiter=None, retrieval_batch_size=256):
+    """
+        - Parameters:
+            - members: pd.DataFrame (chunk with the columns added by assign_cohorts)
+            - templates: CohortTemplates
+            - executor: ThreadPoolExecutor
+            - variants: int
+            - limiter: RateLimiter or None
+            - retrieval_batch_size: int
+
+        - Returns:
+            - dict: cohort -> template variants for every cohort in this chunk that has a template
+
+        - Description:
+            - Retrieves context once per cohort not yet cached and generates its variants, one LLM call each.
+    """
+    chunk_templates = {}
+    representatives = []
+    for row in members.drop_duplicates("Cohort").to_dict("records"):
+        cached = templates.get(row["Cohort"])
+        if cached is not None:
+            chunk_templates[row["Cohort"]] = cached
+        else:
+            representatives.append(row)
+
+    for start in range(0, len(representatives), retrieval_batch_size):
+        batch = representatives[start:start + retrieval_batch_size]
+        try:
+            retrieved = retrieve_contexts([build_cohort_query(row) for row in batch])
         except Exception as e:
-            print(f"Error processing {email}: {e}")
+            print(f"Error retrieving context for {len(batch)} cohorts: {e}")
+            continue
+        jobs = [(row, context, variant) for row, context in zip(batch, retrieved) for variant in range(variants)]
+        bodies = list(executor.map(lambda job: generate_cohort_template(job[0], job[1], job[2], variants, limiter), jobs))
+        for index, row in enumerate(batch):
+            cohort_bodies = bodies[index * variants:(index + 1) * variants]
+            # A failed variant falls back to one that succeeded
+            succeeded = [body for body in cohort_bodies if body is not None]
+            if succeeded:
+                chunk_templates[row["Cohort"]] = [body if body is not None else succeeded[0] for body in cohort_bodies]
+                templates.put(row["Cohort"], chunk_templates[row["Cohort"]])
+    return chunk_templates
+
+def fill_cohort_emails(members, templates, variants):
+    """
+        - Parameters:
+            - members: pd.DataFrame
+            - templates: dict (cohort -> template variants, from prepare_cohort_templates)
+            - variants: int
+
+        - Returns:
+            - generator: Email_address, Subject and Email Template Body dicts in input order
+    """
+    for row in members.to_dict("records"):
+        cohort_templates = templates.get(row["Cohort"])
+        if cohort_templates is None:
+            continue
+        email, first_name, last_name, company_name, title = prospect_fields(row)
+        yield {
+            "Email_address": email,
+            "Subject": f"Enhancing Healthcare Operations for {first_name} at {company_name}",
+            "Email Template Body": personalize(cohort_templates[variant_for(email, variants)], first_name, company_name, title)
+        }
+
+def create_email(max_concurrency=8, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, retrieval_batch_size=256, output_path="data/generated_emails.csv", resume=True, flush_every=50, prospects_path="data/prospects.csv", chunk_size=DEFAULT_CHUNK_SIZE, cohorts=False, cohort_variants=DEFAULT_COHORT_VARIANTS, manifest=None):
+    """
+        - Parameters:
+            - max_concurrency: int
+            - requests_per_minute: int
+            - tokens_per_minute: int
+            - retrieval_batch_size: int
+            - output_path: str
+            - resume: bool
+            - flush_every: int
+            - prospects_path: str
+            - chunk_size: int
+            - cohorts: bool
+            - cohort_variants: int
+            - manifest: CampaignManifest or None
+
+        - Returns:
+            - str: path of the generated emails CSV
+
+        - Description:
+            This function generates personalized email templates for each prospect in the prospects.csv file.
+            Prospects are processed by a pool of `max_concurrency` workers sharing one RPM/TPM limiter,
+            and the results keep the input order. Context is retrieved in batches of `retrieval_batch_size`.
+            Emails are streamed to `output_path` as they are generated; with resume=True, prospects
+            already checkpointed by a previous run are skipped.
+            Prospects are streamed from `prospects_path` in chunks of `chunk_size` rows, so memory stays
+            flat regardless of the size of the list.
+            With cohorts=True, prospects sharing (Zoho match, domain, title bucket) share one retrieval and
+            `cohort_variants` generated templates, which are then filled in per person.
+            With a manifest, only prospects that are new, changed, or were generated with another prompt
+            version are processed, and each batch's results are recorded in it.
+    """
+    zoho_domains = read_domain_index("data/zoho_emails.csv", chunk_size=chunk_size)
+
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    with StreamingEmailWriter(output_path, flush_every=flush_every, resume=resume) as writer:
+        if resume and writer.completed:
+            print(f"Resuming: {len(writer.completed)} prospects already generated.")
+        skip = set(writer.completed)
+        if manifest is not None:
+            prompt_version = manifest_prompt_version(cohorts)
+
+        def chunk_filter(chunk):
+            if manifest is not None:
+                chunk = manifest.filter_changed(chunk, prompt_version)
+            # Resolve the Zoho sister-company check for the whole chunk at once
+            return zoho_domains.match_domains(chunk)
+
+        if cohorts:
+            templates = CohortTemplates()
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                for chunk in iter_prospect_chunks(prospects_path, chunk_size, skip, chunk_filter):
+                    members = assign_cohorts(chunk, zoho_domains)
+                    chunk_templates = prepare_cohort_templates(members, templates, executor, cohort_variants, limiter, retrieval_batch_size)
+                    results = list(fill_cohort_emails(members, chunk_templates, cohort_variants))
+                    for result in results:
+                        writer.write(result)
+                    if manifest is not None:
+                        # Flush first so the manifest never records a result missing from output_path
+                        writer.flush()
+                        manifest.record(results, dict(zip(members["Email"], members["Content_Hash"])), prompt_version)
+            return output_path
+
+        batches = iter_prospects(prospects_path, retrieval_batch_size, chunk_size, skip=skip, chunk_filter=chunk_filter)
+
+        # executor.map yields in submission order, so the output matches prospects.csv
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            for records in batches:
+                retrieved = retrieve_for_chunk(records, zoho_domains)
+                results = [
+                    result for result in executor.map(lambda pair: generate_email_for_prospect(pair[0], pair[1], limiter), retrieved)
+                    if result is not None
+                ]
+                for result in results:
+                    writer.write(result)
+                if manifest is not None:
+                    writer.flush()
+                    manifest.record(results, {record["Email"]: record["Content_Hash"] for record in records}, prompt_version)
 
-    # Save the generated emails to a CSV file
-    mail_df.to_csv("data/generated_emails.csv", index=False)
-    return mail_df
\ No newline at end of file
+    return output_path
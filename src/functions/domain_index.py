@@ -0,0 +1,121 @@
+import pandas as pd
+
+
+def domain_of(email):
+    """
+        - Parameters:
+            - email: str
+
+        - Returns:
+            - str: lower-cased domain of the email address
+
+        - Description:
+            - Raises ValueError for strings without an '@'.
+    """
+    local, sep, domain = email.strip().rpartition('@')
+    if not sep or not local or not domain:
+        raise ValueError(f"Invalid email address: {email}")
+    return domain.lower()
+
+
+def extract_domains(emails):
+    """
+        - Parameters:
+            - emails: pd.Series of str
+
+        - Returns:
+            - pd.Series: lower-cased domains (NaN where the value is not an email address)
+
+        - Description:
+            - Vectorized equivalent of domain_of for a whole column.
+    """
+    return emails.astype("string").str.strip().str.extract(r"[^@]+@([^@]+)$", expand=False).str.lower()
+
+
+class DomainIndex:
+    """
+        - Parameters:
+            - accounts_by_domain: dict (domain -> list of account names)
+
+        - Description:
+            - Hashed domain lookup built once and shared by every prospect check.
+            - Membership tests are O(1) and match_domains resolves a whole prospect list in one pass.
+    """
+
+    def __init__(self, accounts_by_domain):
+        self.accounts_by_domain = accounts_by_domain
+
+    @classmethod
+    def from_customers(cls, df, email_column='AP Email', account_column='Account Name'):
+        """
+            - Parameters:
+                - df: pd.DataFrame
+                - email_column: str
+                - account_column: str
+
+            - Returns:
+                - DomainIndex: domain -> account names of the existing customers
+        """
+        if email_column not in df.columns or account_column not in df.columns:
+            raise ValueError(f"The DataFrame must contain '{email_column}' and '{account_column}' columns")
+        domains = extract_domains(df[email_column])
+        grouped = df[account_column].groupby(domains, sort=False).agg(list)
+        return cls(grouped.to_dict())
+
+    @classmethod
+    def from_emails(cls, emails):
+        """
+            - Parameters:
+                - emails: list or pd.Series of str
+
+            - Returns:
+                - DomainIndex: domains only, with no account names attached
+        """
+        domains = extract_domains(pd.Series(emails)).dropna().unique()
+        return cls({domain: [] for domain in domains})
+
+    def merge(self, other):
+        """
+            - Parameters:
+                - other: DomainIndex
+
+            - Description:
+                - Adds the domains and account names of `other`, e.g. when building from a file chunk by chunk.
+        """
+        for domain, accounts in other.accounts_by_domain.items():
+            self.accounts_by_domain.setdefault(domain, []).extend(accounts)
+        return self
+
+    def __contains__(self, domain):
+        return domain in self.accounts_by_domain
+
+    def __len__(self):
+        return len(self.accounts_by_domain)
+
+    def accounts(self, domain):
+        return self.accounts_by_domain.get(domain, [])
+
+    def match_domains(self, prospects_df, email_column='Email'):
+        """
+            - Parameters:
+                - prospects_df: pd.DataFrame
+                - email_column: str
+
+            - Returns:
+                - pd.DataFrame: prospects_df with Domain, Domain_Match and Matched_Accounts columns added
+
+            - Description:
+                - Resolves every prospect against the index in a single vectorized pass (one hashed
+                  lookup per row); an existing Domain column, e.g. from normalize_prospects, is reused.
+        """
+        if "Domain" in prospects_df.columns:
+            domains = prospects_df["Domain"]
+        else:
+            domains = extract_domains(prospects_df[email_column])
+        accounts = domains.map(self.accounts_by_domain)
+        matched = accounts.notna()
+        return prospects_df.assign(
+            Domain=domains,
+            Domain_Match=matched,
+            Matched_Accounts=accounts.where(matched, None)
+        )
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_EVENT_STORE_PATH = os.getenv("ENGAGEMENT_DB_PATH", "data/engagement.sqlite")
+EVENT_TYPES = ("send", "open")
+
+
+class EventStore:
+    """
+        - Parameters:
+            - path: str
+
+        - Description:
+            - Append-only SQLite (WAL) log of send and open events.
+            - Every insert updates the per-email aggregate row in the same transaction, so engagement
+              queries read an indexed table instead of scanning the log or the tracking sheet.
+    """
+
+    def __init__(self, path=DEFAULT_EVENT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT NOT NULL,
+                type TEXT NOT NULL,
+                ts REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_email_type_ts ON events(email, type, ts);
+            CREATE TABLE IF NOT EXISTS email_stats (
+                email TEXT PRIMARY KEY,
+                sends INTEGER NOT NULL DEFAULT 0,
+                opens INTEGER NOT NULL DEFAULT 0,
+                last_sent REAL,
+                last_open REAL,
+                scripted_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_email_stats_opens ON email_stats(opens);
+            CREATE INDEX IF NOT EXISTS idx_email_stats_last_open ON email_stats(last_open);
+        """)
+        self._conn.commit()
+
+    def record_events(self, events):
+        """
+            - Parameters:
+                - events: iterable of (email, type, ts) tuples; ts may be None for "now"
+
+            - Returns:
+                - int: number of events stored
+        """
+        now = time.time()
+        rows = []
+        for email, event_type, ts in events:
+            if event_type not in EVENT_TYPES:
+                raise ValueError(f"Unknown event type: {event_type}")
+            rows.append((email, event_type, ts if ts is not None else now))
+        if not rows:
+            return 0
+
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO events (email, type, ts) VALUES (?, ?, ?)", rows)
+            self._conn.executemany("""
+                INSERT INTO email_stats (email, sends, opens, last_sent, last_open)
+                VALUES (?1, ?2 = 'send', ?2 = 'open',
+                        CASE WHEN ?2 = 'send' THEN ?3 END, CASE WHEN ?2 = 'open' THEN ?3 END)
+                ON CONFLICT(email) DO UPDATE SET
+                    sends = sends + (?2 = 'send'),
+                    opens = opens + (?2 = 'open'),
+                    last_sent = CASE WHEN ?2 = 'send' THEN max(coalesce(last_sent, ?3), ?3) ELSE last_sent END,
+                    last_open = CASE WHEN ?2 = 'open' THEN max(coalesce(last_open, ?3), ?3) ELSE last_open END
+            """, rows)
+        return len(rows)
+
+    def record_send(self, email, ts=None):
+        self.record_events([(email, "send", ts)])
+
+    def record_open(self, email, ts=None):
+        self.record_events([(email, "open", ts)])
+
+    def stats(self, email):
+        """
+            - Returns:
+                - dict: aggregate row for the email, or None if no events were recorded
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT email, sends, opens, last_sent, last_open, scripted_at FROM email_stats WHERE email = ?", (email,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("email", "sends", "opens", "last_sent", "last_open", "scripted_at"), row))
+
+    def hot_leads(self, min_opens, since=None, unscripted=True, limit=None):
+        """
+            - Parameters:
+                - min_opens: int (leads need strictly more opens than this)
+                - since: float (epoch seconds) or None to count all opens
+                - unscripted: bool (exclude leads already marked as scripted)
+                - limit: int or None
+
+            - Returns:
+                - list: dicts with email and opens, most opened first
+        """
+        conditions = ["opens > ?"]
+        params = [min_opens]
+        if since is not None:
+            conditions.append("last_open >= ?")
+            params.append(since)
+        if unscripted:
+            conditions.append("scripted_at IS NULL")
+        query = f"SELECT email, opens FROM email_stats WHERE {' AND '.join(conditions)} ORDER BY opens DESC"
+
+        with self._lock:
+            candidates = self._conn.execute(query, params).fetchall()
+            if since is not None and candidates:
+                # The all-time aggregate is an upper bound; count the window exactly for the candidates only
+                counted = []
+                for start in range(0, len(candidates), 500):
+                    chunk = [email for email, _ in candidates[start:start + 500]]
+                    placeholders = ",".join("?" * len(chunk))
+                    counted.extend(self._conn.execute(
+                        f"SELECT email, COUNT(*) FROM events WHERE type = 'open' AND ts >= ? "
+                        f"AND email IN ({placeholders}) GROUP BY email HAVING COUNT(*) > ?",
+                        [since, *chunk, min_opens]
+                    ).fetchall())
+                candidates = sorted(counted, key=lambda item: item[1], reverse=True)
+
+        leads = [{"email": email, "opens": opens} for email, opens in candidates]
+        return leads[:limit] if limit is not None else leads
+
+    def mark_scripted(self, emails, ts=None):
+        """
+            - Parameters:
+                - emails: iterable of str
+                - ts: float or None
+        """
+        ts = ts if ts is not None else time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO email_stats (email, scripted_at) VALUES (?, ?) "
+                "ON CONFLICT(email) DO UPDATE SET scripted_at = excluded.scripted_at",
+                [(email, ts) for email in emails]
+            )
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,255 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from helpers.output_writer import EMAIL_COLUMNS
+
+DEFAULT_QUEUE_PATH = os.getenv("CAMPAIGN_QUEUE_PATH", "data/campaign_queue.sqlite")
+DEFAULT_LEASE_SECONDS = 120
+# A prospect that fails this many leases is parked as 'failed' instead of being retried forever
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class JobQueue:
+    """
+        - Parameters:
+            - path: str
+            - lease_seconds: float
+            - max_attempts: int
+
+        - Description:
+            - SQLite (WAL) work queue of prospects keyed by email address, shared by every worker process
+              on this host (or on several hosts that share the file on a filesystem with working locks).
+            - Workers lease batches; a lease that is not completed or extended by heartbeat before it
+              expires is handed to the next worker, so work held by a crashed worker is re-leased.
+            - Results are committed per email with INSERT OR IGNORE, so a batch finished twice after a
+              re-lease still produces exactly one result row.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status_lease ON jobs(status, lease_expires);
+            CREATE TABLE IF NOT EXISTS results (
+                email TEXT PRIMARY KEY,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                worker TEXT,
+                completed_at REAL NOT NULL
+            );
+        """)
+
+    def enqueue(self, records, requeue=False):
+        """
+            - Parameters:
+                - records: iterable of prospect dicts with an 'Email' key
+                - requeue: bool (reset emails that are already queued, e.g. prospects a manifest reports as
+                  changed, and drop their old result; jobs under an active lease are left alone)
+
+            - Returns:
+                - int: number of new or requeued jobs (without requeue, emails already queued are ignored)
+        """
+        rows = [(record["Email"], json.dumps(record)) for record in records]
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not requeue:
+                    before = self._conn.total_changes
+                    self._conn.executemany("INSERT OR IGNORE INTO jobs (email, payload) VALUES (?, ?)", rows)
+                    changed = self._conn.total_changes - before
+                else:
+                    self._conn.executemany("""
+                        DELETE FROM results WHERE email = ? AND NOT EXISTS (
+                            SELECT 1 FROM jobs WHERE jobs.email = results.email AND status = 'leased' AND lease_expires >= ?
+                        )
+                    """, [(email, now) for email, _ in rows])
+                    before = self._conn.total_changes
+                    self._conn.executemany("""
+                        INSERT INTO jobs (email, payload) VALUES (?, ?)
+                        ON CONFLICT(email) DO UPDATE SET
+                            payload = excluded.payload, status = 'pending', lease_owner = NULL, lease_expires = NULL, attempts = 0
+                        WHERE NOT (status = 'leased' AND lease_expires >= ?)
+                    """, [(email, payload, now) for email, payload in rows])
+                    changed = self._conn.total_changes - before
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return changed
+
+    def lease(self, worker_id, batch_size):
+        """
+            - Parameters:
+                - worker_id: str
+                - batch_size: int
+
+            - Returns:
+                - list: prospect dicts now leased to worker_id (empty when nothing is available)
+        """
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers never lease the same rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Leases that expired max_attempts times (e.g. a prospect that keeps crashing workers) are parked
+                self._conn.execute("""
+                    UPDATE jobs SET status = 'failed', lease_owner = NULL, lease_expires = NULL
+                    WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+                """, (now, self.max_attempts))
+                rows = self._conn.execute("""
+                    SELECT seq, payload FROM jobs
+                    WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                    ORDER BY seq LIMIT ?
+                """, (now, batch_size)).fetchall()
+                self._conn.executemany("""
+                    UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                    WHERE seq = ?
+                """, [(worker_id, now + self.lease_seconds, seq) for seq, _ in rows])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [json.loads(payload) for _, payload in rows]
+
+    def heartbeat(self, worker_id, emails):
+        """
+            - Description:
+                - Extends worker_id's leases on `emails` by another lease_seconds.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET lease_expires = ? WHERE email = ? AND lease_owner = ? AND status = 'leased'",
+                [(time.time() + self.lease_seconds, email, worker_id) for email in emails]
+            )
+
+    @contextmanager
+    def keep_alive(self, worker_id, emails, interval=None):
+        """
+            - Parameters:
+                - worker_id: str
+                - emails: list of leased emails
+                - interval: float or None (defaults to a third of lease_seconds)
+
+            - Description:
+                - Heartbeats the leases from a background thread for as long as the block runs.
+        """
+        stop = threading.Event()
+        interval = interval or self.lease_seconds / 3
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.heartbeat(worker_id, emails)
+                except sqlite3.Error as e:
+                    print(f"Lease heartbeat failed: {e}")
+
+        thread = threading.Thread(target=run, name=f"lease-heartbeat-{worker_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, worker_id, results, failed=()):
+        """
+            - Parameters:
+                - worker_id: str
+                - results: list of Email_address, Subject and Email Template Body dicts
+                - failed: iterable of emails whose generation failed
+
+            - Description:
+                - Commits results and job states in one transaction. Failed emails go back to 'pending'
+                  until they reach max_attempts, then stay 'failed'.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO results (email, subject, body, worker, completed_at) VALUES (?, ?, ?, ?, ?)",
+                    [(row["Email_address"], row["Subject"], row["Email Template Body"], worker_id, now) for row in results]
+                )
+                self._conn.executemany(
+                    "UPDATE jobs SET status = 'done', lease_owner = NULL, lease_expires = NULL WHERE email = ?",
+                    [(row["Email_address"],) for row in results]
+                )
+                self._conn.executemany("""
+                    UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                                    lease_owner = NULL, lease_expires = NULL
+                    WHERE email = ? AND status = 'leased' AND lease_owner = ?
+                """, [(self.max_attempts, email, worker_id) for email in failed])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def counts(self):
+        """
+            - Returns:
+                - dict: status -> number of jobs
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def remaining(self):
+        counts = self.counts()
+        return counts.get("pending", 0) + counts.get("leased", 0)
+
+    def export(self, path="data/generated_emails.csv", batch_size=5000):
+        """
+            - Parameters:
+                - path: str
+                - batch_size: int
+
+            - Returns:
+                - int: number of rows written, in the order the prospects were enqueued
+
+            - Description:
+                - Writes the committed results in the generated_emails.csv format read by iter_generated_emails.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        written = 0
+        with self._lock, open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(EMAIL_COLUMNS)
+            cursor = self._conn.execute("""
+                SELECT results.email, results.subject, results.body
+                FROM jobs JOIN results ON results.email = jobs.email
+                ORDER BY jobs.seq
+            """)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                written += len(rows)
+        return written
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
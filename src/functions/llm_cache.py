@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from helpers.rate_limiter import call_with_backoff
+from helpers.tracing import get_tracer
+
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+# Set LLM_CACHE_BYPASS=1 to skip the cache for reads (results are still written)
+CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+
+class LLMCache:
+    """
+        - Parameters:
+            - path: str
+            - max_entries: int
+            - ttl_seconds: float
+
+        - Description:
+            - Single-file SQLite store for LLM completions with TTL expiry and LRU eviction.
+            - Safe to share between threads; WAL mode lets several processes share the file.
+    """
+
+    _EVICT_EVERY = 100
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, usage TEXT, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name, messages):
+        """
+            - Parameters:
+                - model_name: str
+                - messages: list of (role, content) tuples
+
+            - Returns:
+                - str: sha256 hex digest identifying the request
+        """
+        payload = json.dumps([model_name, messages], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, usage, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return row[0], json.loads(row[1]) if row[1] else None
+
+    def put(self, key, content, usage=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, usage, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, content, json.dumps(usage) if usage else None, now, now)
+            )
+            self._puts += 1
+            if self._puts % self._EVICT_EVERY == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+class CachedAgent:
+    """
+        - Parameters:
+            - prompt_template: ChatPromptTemplate
+            - llm: ChatOpenAI
+            - cache: LLMCache
+            - callbacks: list or None (LangChain callbacks attached to the underlying runnable)
+            - stage: str (tracing stage name)
+
+        - Description:
+            - Drop-in replacement for `prompt_template | llm` that answers repeated requests from the cache.
+            - The key covers the model name and every rendered message, so a prompt change is a cache miss.
+    """
+
+    def __init__(self, prompt_template, llm, cache, callbacks=None, stage="llm"):
+        self.prompt_template = prompt_template
+        self.llm = llm
+        self.cache = cache
+        self.stage = stage
+        self.runnable = prompt_template | llm
+        if callbacks:
+            self.runnable = self.runnable.with_config(callbacks=callbacks)
+        self.model_name = getattr(llm, "model_name", None) or getattr(llm, "model", "")
+
+    def cache_key(self, input):
+        messages = self.prompt_template.invoke(input).to_messages()
+        return LLMCache.make_key(self.model_name, [(message.type, message.content) for message in messages])
+
+    def invoke(self, input, refresh=False, **call_kwargs):
+        """
+            - Parameters:
+                - input: str or dict
+                - refresh: bool (skip the lookup and overwrite the cached value)
+                - call_kwargs: forwarded to call_with_backoff (limiter, estimated_tokens, ...)
+
+            - Returns:
+                - AIMessage
+        """
+        key = self.cache_key(input)
+        if not (refresh or CACHE_BYPASS):
+            cached = self.cache.get(key)
+            if cached is not None:
+                from langchain_core.messages import AIMessage
+                content, _ = cached
+                get_tracer().record(self.stage, 0.0, model=None, cache_hit=True)
+                return AIMessage(content=content, response_metadata={"cache_hit": True})
+
+        response = call_with_backoff(self.runnable.invoke, input, stage=self.stage, **call_kwargs)
+        self.cache.put(key, response.content, getattr(response, "usage_metadata", None))
+        return response
+
+    def batch(self, inputs, max_concurrency=8, refresh=False, **call_kwargs):
+        """
+            - Parameters:
+                - inputs: list of str or dict
+                - max_concurrency: int
+                - refresh: bool
+
+            - Returns:
+                - list: AIMessage or the raised Exception for each input, in input order
+        """
+        def run(input):
+            try:
+                return self.invoke(input, refresh=refresh, **call_kwargs)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(run, inputs))
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """
+        - Returns:
+            - LLMCache: the process-wide cache at DEFAULT_CACHE_PATH
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMCache()
+        return _shared_cache
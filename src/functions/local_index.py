@@ -0,0 +1,278 @@
+import json
+import os
+import uuid
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+DEFAULT_LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/local_index")
+# Queries scored per matrix product; bounds the (queries x corpus) score matrix
+QUERY_BLOCK_SIZE = 1024
+# IVF lists probed per query when the index was built with ivf_lists > 0
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 20
+KMEANS_SAMPLE_SIZE = 50000
+
+
+def _kmeans(vectors, lists, seed=0):
+    """
+        - Parameters:
+            - vectors: np.ndarray (n, dim), unit-normalized
+            - lists: int
+            - seed: int
+
+        - Returns:
+            - np.ndarray: (lists, dim) unit-normalized centroids (spherical k-means)
+    """
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE_SIZE), replace=False)]
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        for list_id in range(lists):
+            members = sample[assignments == list_id]
+            if len(members):
+                centroids[list_id] = members.mean(axis=0)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def _embed(texts, embedding, batch_size):
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(embedding.embed_documents(texts[start:start + batch_size]))
+        print(f"Embedded {min(start + batch_size, len(texts))}/{len(texts)} chunks")
+    return vectors
+
+
+def _top_k(scores, k):
+    """
+        - Parameters:
+            - scores: np.ndarray (queries, candidates)
+            - k: int
+
+        - Returns:
+            - tuple: (indices, scores) arrays of shape (queries, k), best first
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((len(scores), 0), dtype=np.int64), np.empty((len(scores), 0), dtype=scores.dtype)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class LocalVectorIndex(VectorStore):
+    """
+        - Parameters:
+            - path: str (directory written by LocalVectorIndex.build)
+            - embedding: Embeddings or None (only needed for text queries; must be the model the index was
+              built with)
+            - nprobe: int
+
+        - Description:
+            - In-process cosine-similarity index over a few thousand to a few million chunks.
+            - float32 vectors and their precomputed norms are memory-mapped .npy files, so opening the index
+              is instant and pages are shared between worker processes.
+            - Many queries are scored with one matrix product; with IVF the corpus is clustered at build
+              time and each query only scores the `nprobe` closest lists.
+    """
+
+    def __init__(self, path=DEFAULT_LOCAL_INDEX_PATH, embedding=None, nprobe=DEFAULT_NPROBE):
+        with open(os.path.join(path, "meta.json"), "r") as file:
+            self.meta = json.load(file)
+        model = getattr(embedding, "model", None)
+        if embedding is not None and self.meta.get("model") and model != self.meta["model"]:
+            # Vectors from another model share no space with the index, so every search would be noise
+            raise ValueError(f"Index at {path} was built with embedding model {self.meta['model']!r}, not {model!r}")
+        with open(os.path.join(path, "documents.json"), "r", encoding="utf-8") as file:
+            self.documents = [Document(page_content=doc["page_content"], metadata=doc.get("metadata") or {}) for doc in json.load(file)]
+        self.path = path
+        self.embedding = embedding
+        self.nprobe = nprobe
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.norms = np.load(os.path.join(path, "norms.npy"), mmap_mode="r")
+        self.centroids = None
+        self.list_offsets = None
+        if self.meta.get("ivf_lists"):
+            self.centroids = np.load(os.path.join(path, "centroids.npy"))
+            self.list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    @classmethod
+    def build(cls, documents, embedding, path=DEFAULT_LOCAL_INDEX_PATH, batch_size=256, ivf_lists=0):
+        """
+            - Parameters:
+                - documents: list of Document
+                - embedding: Embeddings
+                - path: str
+                - batch_size: int (texts per embed_documents call)
+                - ivf_lists: int (0 builds an exact index)
+
+            - Returns:
+                - LocalVectorIndex: the index opened from `path`
+
+            - Description:
+                - Embeds the corpus once and writes meta.json, documents.json, vectors.npy and norms.npy
+                  (plus centroids.npy and list_offsets.npy for IVF) into `path`.
+        """
+        vectors = _embed([doc.page_content for doc in documents], embedding, batch_size)
+        cls._write(path, documents, vectors, getattr(embedding, "model", ""), ivf_lists)
+        return cls(path, embedding)
+
+    @staticmethod
+    def _write(path, documents, vectors, model, ivf_lists):
+        """
+            - Description:
+                - Writes the index files for already embedded documents. Each file is written to a temporary
+                  name and renamed into place, so processes that still map the old files keep reading them.
+        """
+        os.makedirs(path, exist_ok=True)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(documents), -1)
+        norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+
+        ivf_lists = min(ivf_lists, len(vectors))
+        meta = {
+            "count": len(vectors),
+            "dim": int(vectors.shape[1]),
+            "model": model,
+            "metric": "cosine",
+            "ivf_lists": ivf_lists
+        }
+
+        def save(name, array):
+            temp_path = os.path.join(path, f".{name}.tmp")
+            with open(temp_path, "wb") as file:
+                np.save(file, array)
+            os.replace(temp_path, os.path.join(path, name))
+
+        def dump(name, value, **kwargs):
+            temp_path = os.path.join(path, f".{name}.tmp")
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(value, file, **kwargs)
+            os.replace(temp_path, os.path.join(path, name))
+
+        if ivf_lists:
+            centroids = _kmeans(vectors / np.maximum(norms[:, None], 1e-12), ivf_lists)
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            # Store each list contiguously so a probe reads one slice
+            order = np.argsort(assignments, kind="stable")
+            vectors, norms = vectors[order], norms[order]
+            documents = [documents[index] for index in order]
+            list_offsets = np.searchsorted(assignments[order], np.arange(ivf_lists + 1)).astype(np.int64)
+            save("centroids.npy", centroids.astype(np.float32))
+            save("list_offsets.npy", list_offsets)
+
+        save("vectors.npy", vectors)
+        save("norms.npy", norms)
+        dump("documents.json", [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents])
+        # meta.json last: a reader never sees a new count before the arrays it describes
+        dump("meta.json", meta, indent=2)
+
+    def _search_exact(self, queries, query_norms, k):
+        scores = (queries @ self.vectors.T) / (np.maximum(self.norms, 1e-12)[None, :] * query_norms[:, None])
+        return _top_k(scores, k)
+
+    def _search_ivf(self, queries, query_norms, k):
+        probes = _top_k(queries @ self.centroids.T, self.nprobe)[0]
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, lists in enumerate(probes):
+            candidates = np.concatenate([np.arange(self.list_offsets[list_id], self.list_offsets[list_id + 1]) for list_id in lists])
+            if not len(candidates):
+                continue
+            candidate_scores = (self.vectors[candidates] @ queries[row]) / (np.maximum(self.norms[candidates], 1e-12) * query_norms[row])
+            top, top_scores = _top_k(candidate_scores[None, :], k)
+            indices[row, :top.shape[1]] = candidates[top[0]]
+            scores[row, :top.shape[1]] = top_scores[0]
+        return indices, scores
+
+    def search_by_vectors(self, embeddings, k=4):
+        """
+            - Parameters:
+                - embeddings: list of query vectors
+                - k: int
+
+            - Returns:
+                - list: one list of (Document, cosine similarity) per query, best first
+        """
+        if not len(embeddings):
+            return []
+        results = []
+        for start in range(0, len(embeddings), QUERY_BLOCK_SIZE):
+            queries = np.asarray(embeddings[start:start + QUERY_BLOCK_SIZE], dtype=np.float32)
+            query_norms = np.maximum(np.linalg.norm(queries, axis=1), 1e-12)
+            search = self._search_ivf if self.centroids is not None else self._search_exact
+            indices, scores = search(queries, query_norms, k)
+            for row_indices, row_scores in zip(indices, scores):
+                results.append([
+                    (self.documents[index], float(score))
+                    for index, score in zip(row_indices, row_scores) if index >= 0
+                ])
+        return results
+
+    def similarity_search_with_score_by_vectors(self, embeddings, k=4, **kwargs):
+        return self.search_by_vectors(embeddings, k)
+
+    def similarity_search_by_vectors(self, embeddings, k=4, **kwargs):
+        return [[doc for doc, _ in hits] for hits in self.search_by_vectors(embeddings, k)]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        return self.search_by_vectors([embedding], k)[0]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        if self.embedding is None:
+            raise ValueError("LocalVectorIndex needs an embedding to search by text")
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    def add_texts(self, texts, metadatas=None, ids=None, batch_size=256, **kwargs):
+        """
+            - Parameters:
+                - texts: list of str
+                - metadatas: list of dict or None
+                - ids: list of str or None (stored as metadata["id"]; generated when missing)
+                - batch_size: int
+
+            - Returns:
+                - list: ids of the added texts
+
+            - Description:
+                - Embeds only the new texts, then rewrites the index files with the existing vectors (and,
+                  for IVF, re-clusters the lists) and reopens it. Meant for occasional additions; other
+                  processes pick the change up when they reopen the index.
+        """
+        if self.embedding is None:
+            raise ValueError("LocalVectorIndex needs an embedding to add texts")
+        texts = list(texts)
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        added = [Document(page_content=text, metadata={**metadata, "id": id_}) for text, metadata, id_ in zip(texts, metadatas, ids)]
+        if not added:
+            return []
+
+        new_vectors = np.asarray(_embed(texts, self.embedding, batch_size), dtype=np.float32).reshape(len(texts), -1)
+        if self.meta["count"] and new_vectors.shape[1] != self.meta["dim"]:
+            raise ValueError(f"Embedding dimension {new_vectors.shape[1]} does not match the index ({self.meta['dim']})")
+        vectors = np.concatenate([np.asarray(self.vectors, dtype=np.float32).reshape(-1, new_vectors.shape[1]), new_vectors])
+        self._write(self.path, self.documents + added, vectors, self.meta.get("model", ""), self.meta.get("ivf_lists", 0))
+        self.__init__(self.path, self.embedding, self.nprobe)
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, path=DEFAULT_LOCAL_INDEX_PATH, ivf_lists=0, **kwargs):
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        return cls.build(documents, embedding, path, ivf_lists=ivf_lists)
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from helpers.prospect_stream import PROSPECT_COLUMNS
+
+DEFAULT_MANIFEST_PATH = os.getenv("CAMPAIGN_MANIFEST_PATH", "data/campaign_manifest.sqlite")
+# SQLite caps bound parameters, so emails are looked up in slices of this size
+LOOKUP_BATCH_SIZE = 500
+
+
+def content_hashes(prospects):
+    """
+        - Parameters:
+            - prospects: pd.DataFrame (normalized chunk)
+
+        - Returns:
+            - pd.Series: 16-hex-digit hash of each row's generation inputs (PROSPECT_COLUMNS)
+
+        - Description:
+            - Vectorized and stable across runs (pandas' fixed-key row hashing).
+    """
+    hashes = pd.util.hash_pandas_object(prospects[PROSPECT_COLUMNS].astype(str), index=False)
+    return hashes.map("{:016x}".format)
+
+
+class CampaignManifest:
+    """
+        - Parameters:
+            - path: str
+
+        - Description:
+            - SQLite (WAL) record of every generated prospect: content hash, prompt version and the last
+              generated subject/body.
+            - filter_changed() keeps only prospects that are new, whose fields changed, or that were
+              generated with a different prompt version, so unchanged lists cost no LLM calls.
+            - synced_at tracks what reached the sheet, so results generated by a run that stopped before
+              uploading are still upserted by the next one.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS prospects (
+                email TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                subject TEXT,
+                body TEXT,
+                generated_at REAL NOT NULL,
+                synced_at REAL
+            )
+        """)
+        self._conn.commit()
+
+    def _lookup(self, emails):
+        found = {}
+        with self._lock:
+            for start in range(0, len(emails), LOOKUP_BATCH_SIZE):
+                batch = emails[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                for email, content_hash, prompt_version in self._conn.execute(
+                    f"SELECT email, content_hash, prompt_version FROM prospects WHERE email IN ({placeholders})", batch
+                ):
+                    found[email] = f"{content_hash}:{prompt_version}"
+        return found
+
+    def filter_changed(self, prospects, prompt_version):
+        """
+            - Parameters:
+                - prospects: pd.DataFrame (normalized chunk)
+                - prompt_version: str
+
+            - Returns:
+                - pd.DataFrame: new or changed prospects, with a Content_Hash column to pass back to record()
+        """
+        hashes = content_hashes(prospects)
+        known = self._lookup(prospects["Email"].tolist())
+        current = hashes + f":{prompt_version}"
+        changed = prospects["Email"].map(known).ne(current).to_numpy(dtype=bool)
+        return prospects.assign(Content_Hash=hashes)[changed]
+
+    def record(self, results, hashes, prompt_version):
+        """
+            - Parameters:
+                - results: list of Email_address, Subject and Email Template Body dicts
+                - hashes: dict (email -> Content_Hash from filter_changed)
+                - prompt_version: str
+        """
+        now = time.time()
+        rows = [
+            (row["Email_address"], hashes[row["Email_address"]], prompt_version, row["Subject"], row["Email Template Body"], now)
+            for row in results if hashes.get(row["Email_address"])
+        ]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO prospects (email, content_hash, prompt_version, subject, body, generated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(email) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    prompt_version = excluded.prompt_version,
+                    subject = excluded.subject,
+                    body = excluded.body,
+                    generated_at = excluded.generated_at
+            """, rows)
+
+    def iter_unsynced(self, batch_size=500):
+        """
+            - Parameters:
+                - batch_size: int
+
+            - Returns:
+                - generator: lists of Email_address, Subject and Email Template Body dicts generated since
+                  they were last synced to the sheet
+        """
+        last_email = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute("""
+                    SELECT email, subject, body FROM prospects
+                    WHERE (synced_at IS NULL OR synced_at < generated_at) AND email > ?
+                    ORDER BY email LIMIT ?
+                """, (last_email, batch_size)).fetchall()
+            if not rows:
+                return
+            last_email = rows[-1][0]
+            yield [{"Email_address": email, "Subject": subject, "Email Template Body": body} for email, subject, body in rows]
+
+    def mark_synced(self, results):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE prospects SET synced_at = ? WHERE email = ?",
+                [(time.time(), row["Email_address"]) for row in results]
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM prospects").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,111 @@
+import csv
+import os
+import threading
+
+EMAIL_COLUMNS = ["Email_address", "Subject", "Email Template Body"]
+
+
+class StreamingEmailWriter:
+    """
+        - Parameters:
+            - path: str
+            - checkpoint_path: str
+            - flush_every: int
+            - resume: bool
+            - fieldnames: list
+
+        - Description:
+            - Appends generated emails to a CSV as they are produced and flushes every `flush_every` rows.
+            - After each flush the finished email addresses are appended to a checkpoint file,
+              so a restarted run can skip them. With resume=False both files start empty.
+            - A crash in the middle of a flush can leave a row in the CSV that is not checkpointed;
+              that prospect is regenerated on resume.
+    """
+
+    def __init__(self, path="data/generated_emails.csv", checkpoint_path=None, flush_every=50, resume=True, fieldnames=EMAIL_COLUMNS):
+        self.path = path
+        self.checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+        self.flush_every = flush_every
+        self.fieldnames = fieldnames
+        self._buffer = []
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if not resume:
+            for file_path in (self.path, self.checkpoint_path):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+        self.completed = set()
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r") as file:
+                self.completed = {line.strip() for line in file if line.strip()}
+
+        write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        if write_header:
+            self._writer.writeheader()
+        self._checkpoint = open(self.checkpoint_path, "a")
+
+    def is_done(self, email):
+        return email in self.completed
+
+    def write(self, record):
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        self._writer.writerows(self._buffer)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        emails = [record[self.fieldnames[0]] for record in self._buffer]
+        self._checkpoint.write("".join(f"{email}\n" for email in emails))
+        self._checkpoint.flush()
+        self.completed.update(emails)
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._checkpoint.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_generated_emails(path="data/generated_emails.csv", batch_size=500):
+    """
+        - Parameters:
+            - path: str
+            - batch_size: int
+
+        - Returns:
+            - generator: lists of up to `batch_size` email records (dicts)
+
+        - Description:
+            - Reads the generated emails lazily so large runs never need to be held in memory.
+    """
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        batch = []
+        for record in csv.DictReader(file):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,120 @@
+import pandas as pd
+from helpers.domain_index import DomainIndex, extract_domains
+
+PROSPECT_COLUMNS = ["Email", "First Name", "Last Name", "Company", "Title"]
+DEFAULT_COMPANY = "your organization"
+DEFAULT_TITLE = "your team"
+# Rows parsed per pandas chunk; memory stays proportional to this, not to the file size
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def normalize_prospects(chunk):
+    """
+        - Parameters:
+            - chunk: pd.DataFrame (raw prospects rows)
+
+        - Returns:
+            - pd.DataFrame: PROSPECT_COLUMNS plus Domain, with invalid emails dropped
+
+        - Description:
+            - Vectorized per chunk: trims the text columns, fills Company/Title defaults and blank names,
+              and extracts the lower-cased email domain.
+    """
+    missing = [column for column in PROSPECT_COLUMNS if column not in chunk.columns]
+    if "Email" in missing:
+        raise ValueError("The prospects file must contain an 'Email' column")
+    chunk = chunk.reindex(columns=PROSPECT_COLUMNS)
+
+    for column in PROSPECT_COLUMNS:
+        chunk[column] = chunk[column].astype("string").str.strip().replace("", pd.NA)
+    chunk["Company"] = chunk["Company"].fillna(DEFAULT_COMPANY)
+    chunk["Title"] = chunk["Title"].fillna(DEFAULT_TITLE)
+    chunk["First Name"] = chunk["First Name"].fillna("")
+    chunk["Last Name"] = chunk["Last Name"].fillna("")
+    chunk["Domain"] = extract_domains(chunk["Email"])
+
+    valid = chunk["Domain"].notna()
+    if not valid.all():
+        print(f"Skipping {int((~valid).sum())} prospects without a valid email address.")
+    return chunk[valid]
+
+
+def iter_prospect_chunks(path="data/prospects.csv", chunk_size=DEFAULT_CHUNK_SIZE, skip=None, chunk_filter=None):
+    """
+        - Parameters:
+            - path: str
+            - chunk_size: int
+            - skip: set of emails or None (e.g. prospects already generated by a previous run)
+            - chunk_filter: callable or None (normalized chunk -> chunk, e.g. CampaignManifest.filter_changed)
+
+        - Returns:
+            - generator: normalized pd.DataFrame chunks of at most chunk_size rows
+
+        - Description:
+            - Reads only the prospect columns, as strings, one chunk at a time.
+    """
+    try:
+        reader = pd.read_csv(
+            path,
+            chunksize=chunk_size,
+            dtype=str,
+            keep_default_na=False,
+            usecols=lambda column: column in PROSPECT_COLUMNS
+        )
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Prospects file not found at path: {path}")
+    except pd.errors.EmptyDataError:
+        raise ValueError(f"Prospects file at path {path} is empty")
+
+    with reader:
+        for chunk in reader:
+            chunk = normalize_prospects(chunk)
+            if skip:
+                chunk = chunk[~chunk["Email"].map(skip.__contains__).astype(bool)]
+            if chunk_filter is not None and len(chunk):
+                chunk = chunk_filter(chunk)
+            if len(chunk):
+                yield chunk
+
+
+def iter_prospects(path="data/prospects.csv", batch_size=256, chunk_size=DEFAULT_CHUNK_SIZE, skip=None, chunk_filter=None):
+    """
+        - Parameters:
+            - path: str
+            - batch_size: int
+            - chunk_size: int
+            - skip: set of emails or None
+            - chunk_filter: callable or None
+
+        - Returns:
+            - generator: lists of at most batch_size prospect dicts (Email, First Name, Last Name, Company, Title, Domain)
+
+        - Description:
+            - Batches are sliced from one parsed chunk at a time, so only a single chunk is ever resident.
+    """
+    for chunk in iter_prospect_chunks(path, chunk_size, skip, chunk_filter):
+        records = chunk.to_dict("records")
+        for start in range(0, len(records), batch_size):
+            yield records[start:start + batch_size]
+
+
+def read_domain_index(path, email_column="Email", account_column=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+        - Parameters:
+            - path: str
+            - email_column: str
+            - account_column: str or None (attach account names, e.g. 'Account Name' for existing customers)
+            - chunk_size: int
+
+        - Returns:
+            - DomainIndex: built chunk by chunk from only the columns it needs
+    """
+    columns = [email_column] + ([account_column] if account_column else [])
+    index = DomainIndex({})
+    with pd.read_csv(path, usecols=columns, dtype=str, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            if account_column:
+                index.merge(DomainIndex.from_customers(chunk, email_column, account_column))
+            else:
+                index.merge(DomainIndex.from_emails(chunk[email_column]))
+    return index
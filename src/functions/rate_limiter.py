@@ -0,0 +1,151 @@
+import random
+import threading
+import time
+from helpers.tracing import get_tracer
+
+# Defaults sized for a gpt-4o tier-1 key; raise them as the quota grows.
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 30000
+
+
+class TokenBucket:
+    """
+        - Parameters:
+            - capacity: float
+            - refill_per_second: float
+
+        - Description:
+            - Classic token bucket. Holds up to `capacity` tokens and refills continuously.
+            - The level may go negative when actual usage is reported after the fact.
+    """
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._level = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._level = min(self.capacity, self._level + elapsed * self.refill_per_second)
+
+    def wait_time(self, amount, now):
+        """
+            - Returns:
+                - float: seconds until `amount` tokens are available (0 if available now)
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) / self.refill_per_second
+
+    def consume(self, amount):
+        self._level -= amount
+
+
+class RateLimiter:
+    """
+        - Parameters:
+            - requests_per_minute: int
+            - tokens_per_minute: int
+
+        - Description:
+            - Thread-safe limiter tracking both requests per minute and tokens per minute.
+            - `acquire` blocks until both buckets can cover the call.
+            - `record_usage` corrects the token bucket once the real token count is known.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE):
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+                if wait == 0.0:
+                    self._requests.consume(1)
+                    self._tokens.consume(tokens)
+                    return
+            time.sleep(wait)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        with self._lock:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+
+def estimate_tokens(text):
+    """
+        - Parameters:
+            - text: str
+
+        - Returns:
+            - int: rough token count (~4 characters per token)
+    """
+    return len(text) // 4 + 1
+
+
+def is_rate_limit_error(error):
+    """
+        - Parameters:
+            - error: Exception
+
+        - Returns:
+            - bool: True if the error is an HTTP 429 / rate limit response
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_backoff(fn, *args, limiter=None, estimated_tokens=1, max_retries=6, base_delay=1.0, max_delay=60.0, stage=None, **kwargs):
+    """
+        - Parameters:
+            - fn: callable
+            - limiter: RateLimiter or None
+            - estimated_tokens: int
+            - max_retries: int
+            - base_delay: float
+            - max_delay: float
+            - stage: str or None (tracing stage retries are counted under)
+
+        - Returns:
+            - Any: the return value of fn(*args, **kwargs)
+
+        - Description:
+            - Acquires capacity from the limiter, calls fn and retries 429 responses with
+              exponential backoff and jitter, honouring Retry-After when the server sends it.
+            - Any other error is raised immediately.
+    """
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire(estimated_tokens)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt >= max_retries:
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+            print(f"Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            get_tracer().record_retry(stage or getattr(fn, "__name__", "unknown"))
+            time.sleep(delay)
+            attempt += 1
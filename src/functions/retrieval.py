@@ -0,0 +1,144 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from helpers.rate_limiter import call_with_backoff
+from helpers.tracing import get_tracer
+
+DEFAULT_EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite")
+
+
+class EmbeddingCache:
+    """
+        - Parameters:
+            - path: str
+
+        - Description:
+            - Persistent text -> embedding memo stored as float32 blobs in a single SQLite file.
+            - Keys include the embedding model so switching models never returns stale vectors.
+    """
+
+    def __init__(self, path=DEFAULT_EMBEDDING_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name, text):
+        return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """
+            - Parameters:
+                - keys: list of str
+
+            - Returns:
+                - dict: key -> list of float for every key found
+        """
+        found = {}
+        with self._lock:
+            # SQLite caps bound parameters, so look keys up in slices
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, blob in self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items]
+            )
+            self._conn.commit()
+
+
+class BatchRetriever:
+    """
+        - Parameters:
+            - vector_store: VectorStore (e.g. AstraDBVectorStore)
+            - embeddings: Embeddings
+            - k: int
+            - cache: EmbeddingCache or None
+            - max_workers: int
+
+        - Description:
+            - Retrieves documents for many queries at once.
+            - Distinct query strings are embedded in a single embed_documents call (cache misses only)
+              and their similarity searches run concurrently, so cost scales with unique queries.
+    """
+
+    def __init__(self, vector_store, embeddings, k=4, cache=None, max_workers=8):
+        self.vector_store = vector_store
+        self.embeddings = embeddings
+        self.k = k
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.max_workers = max_workers
+        self.model_name = getattr(embeddings, "model", "")
+
+    def embed_queries(self, queries):
+        """
+            - Parameters:
+                - queries: list of unique str
+
+            - Returns:
+                - dict: query -> embedding
+        """
+        keys = {query: EmbeddingCache.make_key(self.model_name, query) for query in queries}
+        cached = self.cache.get_many(list(keys.values()))
+        vectors = {query: cached[key] for query, key in keys.items() if key in cached}
+
+        missing = [query for query in queries if query not in vectors]
+        get_tracer().record("embedding_cache", 0.0, cache_hit=bool(vectors), hits=len(vectors), misses=len(missing))
+        if missing:
+            started = time.perf_counter()
+            new_vectors = call_with_backoff(self.embeddings.embed_documents, missing, stage="embedding")
+            get_tracer().record(
+                "embedding", time.perf_counter() - started, model=self.model_name,
+                prompt_tokens=sum(len(query) for query in missing) // 4, texts=len(missing)
+            )
+            self.cache.put_many([(keys[query], vector) for query, vector in zip(missing, new_vectors)])
+            vectors.update(zip(missing, new_vectors))
+        return vectors
+
+    def retrieve_many(self, queries, k=None, with_scores=False):
+        """
+            - Parameters:
+                - queries: list of str (duplicates allowed)
+                - k: int or None (defaults to self.k)
+                - with_scores: bool
+
+            - Returns:
+                - list: one list of Documents (or (Document, score) pairs with with_scores) per input query, in input order
+        """
+        k = k or self.k
+        unique = list(dict.fromkeys(queries))
+        vectors = self.embed_queries(unique)
+
+        # Local indexes score every query in one matrix product
+        batched = "similarity_search_with_score_by_vectors" if with_scores else "similarity_search_by_vectors"
+        if hasattr(self.vector_store, batched):
+            with get_tracer().span("vector_search", queries=len(unique)):
+                results = dict(zip(unique, getattr(self.vector_store, batched)([vectors[query] for query in unique], k=k)))
+            return [results[query] for query in queries]
+
+        method = self.vector_store.similarity_search_with_score_by_vector if with_scores else self.vector_store.similarity_search_by_vector
+
+        def search(query):
+            with get_tracer().span("vector_search"):
+                return call_with_backoff(method, vectors[query], k=k, stage="vector_search")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = dict(zip(unique, executor.map(search, unique)))
+        return [results[query] for query in queries]
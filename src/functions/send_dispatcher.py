@@ -0,0 +1,624 @@
+import csv
+import json
+import os
+import queue
+import smtplib
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from urllib.parse import quote
+from helpers.rate_limiter import TokenBucket
+from helpers.tracing import get_tracer
+
+DEFAULT_TRACKING_PIXEL_URL = os.getenv("TRACKING_PIXEL_URL", "http://localhost:8080/pixel")
+DEFAULT_SENDER_NAME = os.getenv("SENDER_NAME", "Company name")
+DEFAULT_ALIAS_STATE_PATH = os.getenv("ALIAS_QUOTA_PATH", "data/alias_quota.json")
+# Gmail's per-account daily limit for Workspace users; override per alias
+DEFAULT_DAILY_QUOTA = 2000
+DEFAULT_SENDS_PER_MINUTE = 20
+MAX_SEND_ATTEMPTS = 3
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Sheet columns (1-based letters), matching app_script.js: D Last Sent, E status, G Open Amount, H Sent Timestamp
+LAST_SENT_COLUMN = "D"
+STATUS_COLUMN = "E"
+OPEN_AMOUNT_COLUMN = "G"
+SENT_TIMESTAMP_COLUMN = "H"
+
+
+class QuotaExceededError(Exception):
+    """Raised by a transport when the provider reports that an alias is out of daily quota."""
+
+
+class ThrottledError(Exception):
+    """Raised by a transport when the provider asks to slow down (temporary 4xx)."""
+
+
+def is_transient_send_error(error):
+    """
+        - Parameters:
+            - error: Exception raised by a transport
+
+        - Returns:
+            - bool: True for errors worth retrying (4xx replies, dropped or refused connections), False for
+              permanent ones (5xx replies, refused recipients)
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError; the rest of OSError is socket-level (timeouts, resets)
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SendJob:
+    __slots__ = ("email", "subject", "body", "row", "attempts")
+
+    def __init__(self, email, subject, body, row=None):
+        self.email = email
+        self.subject = subject
+        self.body = body
+        self.row = row
+        self.attempts = 0
+
+
+class Alias:
+    """
+        - Parameters:
+            - address: str
+            - daily_quota: int
+            - per_minute: float
+            - sent_today: int
+
+        - Description:
+            - Remaining daily quota plus a token bucket pacing sends at per_minute.
+    """
+
+    def __init__(self, address, daily_quota=DEFAULT_DAILY_QUOTA, per_minute=DEFAULT_SENDS_PER_MINUTE, sent_today=0):
+        self.address = address
+        self.daily_quota = daily_quota
+        self.per_minute = per_minute
+        self.sent_today = sent_today
+        self.bucket = TokenBucket(max(1.0, per_minute / 6.0), per_minute / 60.0)
+
+    @property
+    def remaining(self):
+        return max(0, self.daily_quota - self.sent_today)
+
+
+class AliasQuotaStore:
+    """
+        - Parameters:
+            - path: str
+
+        - Description:
+            - Persists per-alias send counts for the current day, so quota is respected across runs.
+    """
+
+    def __init__(self, path=DEFAULT_ALIAS_STATE_PATH):
+        self.path = path
+
+    @staticmethod
+    def _today():
+        return time.strftime("%Y-%m-%d")
+
+    def load(self):
+        try:
+            with open(self.path, "r") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return state.get("counts", {}) if state.get("date") == self._today() else {}
+
+    def save(self, counts):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"date": self._today(), "counts": counts}, file)
+        os.replace(temp_path, self.path)
+
+
+class AliasScheduler:
+    """
+        - Parameters:
+            - aliases: list of Alias
+            - quota_store: AliasQuotaStore or None
+
+        - Description:
+            - Hands out the alias with the most remaining quota among those whose rate bucket allows a send
+              now, and waits only as long as the soonest alias needs. Returns None once every alias is out of
+              quota, so a campaign ends at the provider's limits instead of failing sends.
+    """
+
+    def __init__(self, aliases, quota_store=None):
+        self.aliases = {alias.address: alias for alias in aliases}
+        self.quota_store = quota_store
+        self._lock = threading.Lock()
+        if quota_store is not None:
+            for address, count in quota_store.load().items():
+                if address in self.aliases:
+                    self.aliases[address].sent_today = count
+
+    def acquire(self):
+        """
+            - Returns:
+                - str: alias address to send from, or None when all aliases are out of quota
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                available = [alias for alias in self.aliases.values() if alias.remaining > 0]
+                if not available:
+                    return None
+                waits = {alias.address: alias.bucket.wait_time(1, now) for alias in available}
+                ready = [alias for alias in available if waits[alias.address] == 0.0]
+                if ready:
+                    alias = max(ready, key=lambda alias: (alias.remaining, -alias.sent_today))
+                    alias.bucket.consume(1)
+                    alias.sent_today += 1
+                    return alias.address
+                wait = min(waits.values())
+            time.sleep(wait)
+
+    def release(self, address, sent):
+        # A send that never reached the provider does not count against the alias
+        if not sent:
+            with self._lock:
+                self.aliases[address].sent_today -= 1
+
+    def exhaust(self, address):
+        with self._lock:
+            alias = self.aliases[address]
+            alias.sent_today = max(alias.sent_today, alias.daily_quota)
+
+    def throttle(self, address, seconds=60.0):
+        with self._lock:
+            alias = self.aliases[address]
+            alias.bucket.consume(alias.bucket.refill_per_second * seconds)
+
+    def save(self):
+        if self.quota_store is not None:
+            with self._lock:
+                counts = {address: alias.sent_today for address, alias in self.aliases.items()}
+            self.quota_store.save(counts)
+
+
+class SMTPTransport:
+    """
+        - Parameters:
+            - host: str
+            - port: int
+            - username: str or None
+            - password: str or None
+            - starttls: bool
+            - sender_name: str
+            - pool_size: int (open connections per alias)
+
+        - Description:
+            - Sends HTML mail over SMTP, reusing pooled connections per alias instead of one login per email.
+            - Provider quota (5.4.5 / 4.5.3) and throttling (421/450/451) replies are raised as
+              QuotaExceededError / ThrottledError so the dispatcher can move the job to another alias.
+    """
+
+    def __init__(self, host, port=587, username=None, password=None, starttls=True, sender_name=DEFAULT_SENDER_NAME, pool_size=2, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.sender_name = sender_name
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pools = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, alias):
+        with self._lock:
+            if alias not in self._pools:
+                self._pools[alias] = queue.LifoQueue()
+                self._slots[alias] = threading.BoundedSemaphore(self.pool_size)
+            return self._pools[alias]
+
+    def _slot(self, alias):
+        # Caps concurrent connections per alias at pool_size; providers limit simultaneous SMTP sessions
+        self._pool(alias)
+        return self._slots[alias]
+
+    def _connect(self):
+        with get_tracer().span("smtp", operation="connect"):
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password)
+        return connection
+
+    def _checkout(self, alias):
+        try:
+            return self._pool(alias).get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _checkin(self, alias, connection):
+        pool = self._pool(alias)
+        if pool.qsize() < self.pool_size:
+            pool.put(connection)
+        else:
+            self._quit(connection)
+
+    @staticmethod
+    def _quit(connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    def build_message(self, alias, recipient, subject, html_body):
+        message = EmailMessage()
+        message["From"] = formataddr((self.sender_name, alias))
+        message["To"] = recipient
+        message["Subject"] = subject
+        message["Message-ID"] = make_msgid(domain=alias.rpartition("@")[2] or None)
+        message.set_content("This email requires an HTML-capable client.")
+        message.add_alternative(html_body, subtype="html")
+        return message
+
+    def send(self, alias, recipient, subject, html_body):
+        message = self.build_message(alias, recipient, subject, html_body)
+        with self._slot(alias):
+            self._send(alias, recipient, message)
+
+    def _send(self, alias, recipient, message):
+        for attempt in range(2):
+            connection = self._checkout(alias)
+            try:
+                with get_tracer().span("smtp", operation="send"):
+                    connection.send_message(message, from_addr=alias, to_addrs=[recipient])
+            except smtplib.SMTPServerDisconnected:
+                # A pooled connection the server closed while idle; retry once on a fresh one
+                if attempt:
+                    raise
+                continue
+            except smtplib.SMTPResponseException as e:
+                self._checkin(alias, connection)
+                error = e.smtp_error.decode(errors="replace") if isinstance(e.smtp_error, bytes) else str(e.smtp_error)
+                if "5.4.5" in error or "4.5.3" in error or "quota" in error.lower():
+                    raise QuotaExceededError(error)
+                if e.smtp_code in (421, 450, 451):
+                    raise ThrottledError(error)
+                raise
+            except smtplib.SMTPRecipientsRefused:
+                self._checkin(alias, connection)
+                raise
+            except Exception:
+                self._quit(connection)
+                raise
+            self._checkin(alias, connection)
+            return
+
+    def close(self):
+        with self._lock:
+            pools, self._pools, self._slots = self._pools, {}, {}
+        for pool in pools.values():
+            while not pool.empty():
+                self._quit(pool.get_nowait())
+
+
+class LocalSMTPServer:
+    """
+        - Parameters:
+            - latency: float (seconds added to each accepted message)
+            - daily_quota: int or None (messages accepted per sender before replying 550 5.4.5)
+
+        - Description:
+            - Minimal in-process SMTP sink on a random localhost port, for dry runs and benchmarks without
+              a real mail provider. Accepted messages are kept in `messages` as (sender, recipient, data).
+    """
+
+    def __init__(self, latency=0.0, daily_quota=None):
+        self.latency = latency
+        self.daily_quota = daily_quota
+        self.messages = []
+        self.connections = 0
+        self._sent = {}
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _accept(self, sender, recipients, data):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            count = self._sent.get(sender, 0)
+            if self.daily_quota is not None and count >= self.daily_quota:
+                return "550 5.4.5 Daily user sending quota exceeded"
+            self._sent[sender] = count + 1
+            self.messages.extend((sender, recipient, data) for recipient in recipients)
+        return "250 2.0.0 OK"
+
+    def _handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+            def handle(self):
+                with server._lock:
+                    server.connections += 1
+                sender, recipients = None, []
+                self.reply("220 localhost ESMTP")
+                for raw in self.rfile:
+                    command = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                    verb = command[:4].upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.reply("250-localhost\r\n250-8BITMIME\r\n250 SMTPUTF8" if verb == "EHLO" else "250 localhost")
+                    elif verb == "MAIL":
+                        sender, recipients = command.partition(":")[2].split()[0].strip("<>"), []
+                        self.reply("250 2.1.0 OK")
+                    elif verb == "RCPT":
+                        recipients.append(command.partition(":")[2].split()[0].strip("<>"))
+                        self.reply("250 2.1.5 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        lines = []
+                        for line in self.rfile:
+                            if line in (b".\r\n", b".\n"):
+                                break
+                            lines.append(line[1:] if line.startswith(b"..") else line)
+                        self.reply(server._accept(sender, recipients, b"".join(lines)))
+                        sender, recipients = None, []
+                    elif verb == "RSET":
+                        sender, recipients = None, []
+                        self.reply("250 2.0.0 OK")
+                    elif verb == "NOOP":
+                        self.reply("250 2.0.0 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 2.0.0 Bye")
+                        return
+                    else:
+                        self.reply("502 5.5.2 Command not implemented")
+
+        return Handler
+
+
+class SheetStatusWriter:
+    """
+        - Parameters:
+            - worksheet: gspread.Worksheet
+
+        - Description:
+            - Buffers Sent/Last Sent/Sent Timestamp updates and writes them in one batch_update per flush,
+              instead of four setValue calls per row.
+    """
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self._updates = []
+        self._lock = threading.Lock()
+
+    def add(self, job, status, sent_at, alias=None):
+        if job.row is None:
+            return
+        timestamp = time.strftime(TIMESTAMP_FORMAT, time.localtime(sent_at))
+        with self._lock:
+            if status == "Sent":
+                self._updates.append({"range": f"{LAST_SENT_COLUMN}{job.row}:{STATUS_COLUMN}{job.row}", "values": [[timestamp, "Sent"]]})
+                self._updates.append({"range": f"{OPEN_AMOUNT_COLUMN}{job.row}:{SENT_TIMESTAMP_COLUMN}{job.row}", "values": [["", timestamp]]})
+            else:
+                self._updates.append({"range": f"{STATUS_COLUMN}{job.row}", "values": [[status]]})
+
+    def flush(self):
+        with self._lock:
+            updates, self._updates = self._updates, []
+        if updates:
+            with get_tracer().span("sheets", operation="batch_update", rows=len(updates)):
+                self.worksheet.batch_update(updates, value_input_option="USER_ENTERED")
+        return len(updates)
+
+
+class CSVStatusWriter:
+    """
+        - Parameters:
+            - path: str
+
+        - Description:
+            - Sheet-free status log (email, status, sent_at, alias) for runs from generated_emails.csv.
+    """
+
+    def __init__(self, path="data/send_status.csv"):
+        self.path = path
+        self._rows = []
+        self._lock = threading.Lock()
+
+    def add(self, job, status, sent_at, alias=None):
+        with self._lock:
+            self._rows.append([job.email, status, time.strftime(TIMESTAMP_FORMAT, time.localtime(sent_at)), alias or ""])
+
+    def sent_emails(self):
+        """
+            - Returns:
+                - set: emails logged as Sent by earlier runs
+        """
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, "r", newline="", encoding="utf-8") as file:
+            return {row["Email_address"] for row in csv.DictReader(file) if row.get("Status") == "Sent"}
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if write_header:
+                writer.writerow(["Email_address", "Status", "Sent Timestamp", "Alias"])
+            writer.writerows(rows)
+        return len(rows)
+
+
+def load_jobs_from_sheet(worksheet):
+    """
+        - Parameters:
+            - worksheet: gspread.Worksheet
+
+        - Returns:
+            - list: SendJobs for rows with an email, subject and body that have no Sent Timestamp yet (one read)
+    """
+    jobs = []
+    for row_number, row in enumerate(worksheet.get_all_values()[1:], start=2):
+        row = row + [""] * (8 - len(row))
+        email, subject, body, sent_timestamp = row[0].strip(), row[1], row[2], row[7]
+        if email and subject and body and not sent_timestamp:
+            jobs.append(SendJob(email, subject, body, row_number))
+    return jobs
+
+
+def load_jobs_from_csv(path="data/generated_emails.csv", exclude=()):
+    """
+        - Parameters:
+            - path: str
+            - exclude: set of emails already sent
+
+        - Returns:
+            - list: SendJobs for every generated email not in exclude
+    """
+    from helpers.output_writer import iter_generated_emails
+    return [
+        SendJob(row["Email_address"], row["Subject"], row["Email Template Body"])
+        for batch in iter_generated_emails(path)
+        for row in batch
+        if row.get("Email_address") and row["Email_address"] not in exclude
+    ]
+
+
+class SendDispatcher:
+    """
+        - Parameters:
+            - transport: SMTPTransport (or any object with send(alias, recipient, subject, html_body))
+            - scheduler: AliasScheduler
+            - status_writer: SheetStatusWriter or CSVStatusWriter
+            - tracking_pixel_url: str
+            - max_workers: int
+            - flush_every: int (status updates buffered before a batched write)
+            - event_store: EventStore or None
+
+        - Description:
+            - Sends jobs concurrently through the alias scheduler; throughput is bounded only by each alias's
+              send rate and quota. Quota and throttle replies move the job to another alias.
+    """
+
+    def __init__(self, transport, scheduler, status_writer, tracking_pixel_url=DEFAULT_TRACKING_PIXEL_URL, max_workers=8, flush_every=500, event_store=None):
+        self.transport = transport
+        self.scheduler = scheduler
+        self.status_writer = status_writer
+        self.tracking_pixel_url = tracking_pixel_url
+        self.max_workers = max_workers
+        self.flush_every = flush_every
+        self.event_store = event_store
+        self._pending = 0
+        self._sent_events = []
+        self._lock = threading.Lock()
+
+    def html_body(self, job):
+        separator = "&" if "?" in self.tracking_pixel_url else "?"
+        pixel_url = f"{self.tracking_pixel_url}{separator}email={quote(job.email)}"
+        return job.body + f'<img src="{pixel_url}" width="1" height="1" style="opacity:0; visibility:hidden;">'
+
+    def _record(self, job, status, alias=None):
+        sent_at = time.time()
+        self.status_writer.add(job, status, sent_at, alias)
+        with self._lock:
+            if status == "Sent":
+                self._sent_events.append((job.email, "send", sent_at))
+            self._pending += 1
+            should_flush = self._pending >= self.flush_every
+            if should_flush:
+                self._pending = 0
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        self.status_writer.flush()
+        with self._lock:
+            events, self._sent_events = self._sent_events, []
+        if self.event_store is not None and events:
+            self.event_store.record_events(events)
+        self.scheduler.save()
+
+    def send_one(self, job):
+        """
+            - Returns:
+                - str: "Sent", "Failed" or "Deferred" (every alias out of quota)
+        """
+        while job.attempts < MAX_SEND_ATTEMPTS:
+            alias = self.scheduler.acquire()
+            if alias is None:
+                return "Deferred"
+            job.attempts += 1
+            try:
+                self.transport.send(alias, job.email, job.subject, self.html_body(job))
+            except QuotaExceededError as e:
+                print(f"Alias {alias} is out of quota: {e}")
+                self.scheduler.release(alias, sent=False)
+                self.scheduler.exhaust(alias)
+                job.attempts -= 1
+                continue
+            except ThrottledError as e:
+                print(f"Alias {alias} throttled: {e}")
+                self.scheduler.release(alias, sent=False)
+                self.scheduler.throttle(alias)
+                continue
+            except Exception as e:
+                print(f"Error sending email to {job.email}: {e}")
+                get_tracer().record("smtp", 0.0, status="error", error=str(e)[:200])
+                self.scheduler.release(alias, sent=False)
+                if is_transient_send_error(e):
+                    continue
+                break
+            self._record(job, "Sent", alias)
+            return "Sent"
+        self._record(job, "Failed")
+        return "Failed"
+
+    def dispatch(self, jobs):
+        """
+            - Parameters:
+                - jobs: list of SendJob
+
+            - Returns:
+                - dict: status -> count
+        """
+        counts = {"Sent": 0, "Failed": 0, "Deferred": 0}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for status in executor.map(self.send_one, jobs):
+                    counts[status] += 1
+        finally:
+            self.flush()
+        return counts
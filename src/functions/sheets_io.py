@@ -0,0 +1,108 @@
+import threading
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+from helpers.tracing import get_tracer
+
+SHEETS_SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+
+class SheetsIO:
+    """
+        - Parameters:
+            - credentials_path: str
+            - scope: list
+
+        - Description:
+            - Authorizes Google Sheets once and caches the client and opened worksheets.
+            - Appends are buffered and sent with a single append_rows call per flush,
+              and row deletions are applied in one batchUpdate.
+    """
+
+    def __init__(self, credentials_path, scope=SHEETS_SCOPE):
+        self.credentials_path = credentials_path
+        self.scope = scope
+        self._client = None
+        self._worksheets = {}
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                print("Authorizing Google Sheets...")
+                credentials = ServiceAccountCredentials.from_json_keyfile_name(self.credentials_path, self.scope)
+                self._client = gspread.authorize(credentials)
+            return self._client
+
+    def worksheet(self, sheet_id):
+        """
+            - Parameters:
+                - sheet_id: str
+
+            - Returns:
+                - gspread.Worksheet: first worksheet of the spreadsheet (opened once per process)
+        """
+        if sheet_id not in self._worksheets:
+            client = self.client
+            with get_tracer().span("sheets", operation="open_by_key"):
+                self._worksheets[sheet_id] = client.open_by_key(sheet_id).sheet1
+        return self._worksheets[sheet_id]
+
+    def append(self, sheet_id, row):
+        with self._lock:
+            self._buffers.setdefault(sheet_id, []).append(row)
+
+    def flush(self, sheet_id=None):
+        """
+            - Parameters:
+                - sheet_id: str or None (flush every buffered sheet)
+
+            - Returns:
+                - int: number of rows written
+        """
+        with self._lock:
+            sheet_ids = [sheet_id] if sheet_id else list(self._buffers)
+            pending = {key: self._buffers.pop(key, []) for key in sheet_ids}
+        written = 0
+        for key, rows in pending.items():
+            if rows:
+                worksheet = self.worksheet(key)
+                with get_tracer().span("sheets", operation="append_rows", rows=len(rows)):
+                    worksheet.append_rows(rows, value_input_option="RAW")
+                written += len(rows)
+        return written
+
+    def delete_rows(self, sheet_id, row_numbers):
+        """
+            - Parameters:
+                - sheet_id: str
+                - row_numbers: iterable of 1-based sheet row numbers
+
+            - Description:
+                - Deletes all rows in one batchUpdate. Contiguous rows are merged into one range and ranges are
+                  deleted bottom-up, so earlier deletions never shift the indices of later ones.
+        """
+        rows = sorted(set(row_numbers), reverse=True)
+        if not rows:
+            return
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][0] == row + 1:
+                ranges[-1][0] = row
+            else:
+                ranges.append([row, row + 1])
+
+        worksheet = self.worksheet(sheet_id)
+        requests = [{
+            "deleteDimension": {
+                "range": {
+                    "sheetId": worksheet.id,
+                    "dimension": "ROWS",
+                    "startIndex": start - 1,
+                    "endIndex": end - 1
+                }
+            }
+        } for start, end in ranges]
+        with get_tracer().span("sheets", operation="delete_rows", rows=len(rows)):
+            worksheet.spreadsheet.batch_update({"requests": requests})
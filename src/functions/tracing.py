@@ -0,0 +1,338 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Per-call JSON traces are opt-in (e.g. TRACE_PATH=data/traces.jsonl): one line per external call adds up fast
+DEFAULT_TRACE_PATH = os.getenv("TRACE_PATH") or None
+DEFAULT_METRICS_PATH = os.getenv("METRICS_PATH", "data/metrics.prom")
+# Set METRICS_PORT to expose /metrics over HTTP while a run is in progress
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+# USD per 1M (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-small": (0.02, 0.0),
+}
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class StageMetrics:
+    __slots__ = ("calls", "errors", "seconds", "prompt_tokens", "completion_tokens", "cache_hits", "retries", "cost", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.cost = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+
+class Tracer:
+    """
+        - Parameters:
+            - trace_path: str or None (JSON lines, one per traced call; None keeps only the aggregates)
+            - metrics_path: str
+
+        - Description:
+            - Records every external call (embedding, vector search, LLM, Zoho, Sheets) as a structured JSON trace
+              and aggregates per-stage latency, tokens, retries, cache hits and cost.
+            - Metrics are exported in Prometheus text format to a file and optionally over HTTP.
+    """
+
+    def __init__(self, trace_path=DEFAULT_TRACE_PATH, metrics_path=DEFAULT_METRICS_PATH):
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+        self.stages = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._trace_file = None
+        self._server = None
+
+    def _stage(self, stage):
+        if stage not in self.stages:
+            self.stages[stage] = StageMetrics()
+        return self.stages[stage]
+
+    def record(self, stage, seconds, status="ok", model=None, prompt_tokens=0, completion_tokens=0, cache_hit=False, **attributes):
+        """
+            - Parameters:
+                - stage: str
+                - seconds: float
+                - status: str ("ok" or "error")
+                - model: str or None (used to price tokens)
+                - prompt_tokens: int
+                - completion_tokens: int
+                - cache_hit: bool
+                - attributes: extra fields written to the trace line
+        """
+        prices = MODEL_PRICES.get(model or "", (0.0, 0.0))
+        cost = (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+        trace = {
+            "ts": round(time.time(), 6), "stage": stage, "seconds": round(seconds, 6), "status": status,
+            "model": model, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "cache_hit": cache_hit, "cost_usd": round(cost, 8), **attributes
+        }
+        with self._lock:
+            metrics = self._stage(stage)
+            metrics.calls += 1
+            metrics.errors += status != "ok"
+            metrics.seconds += seconds
+            metrics.prompt_tokens += prompt_tokens
+            metrics.completion_tokens += completion_tokens
+            metrics.cache_hits += bool(cache_hit)
+            metrics.cost += cost
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    metrics.buckets[index] += 1
+            if self.trace_path:
+                if self._trace_file is None:
+                    directory = os.path.dirname(self.trace_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._trace_file = open(self.trace_path, "a")
+                self._trace_file.write(json.dumps(trace, default=str) + "\n")
+
+    def record_retry(self, stage):
+        with self._lock:
+            self._stage(stage).retries += 1
+
+    @contextmanager
+    def span(self, stage, **attributes):
+        """
+            - Description:
+                - Times the enclosed block and records it under `stage`; exceptions are recorded and re-raised.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(stage, time.perf_counter() - started, status="error", error=str(e)[:200], **attributes)
+            raise
+        self.record(stage, time.perf_counter() - started, **attributes)
+
+    def traced(self, stage):
+        """
+            - Description:
+                - Decorator form of span().
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, operation=fn.__name__):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def prometheus(self):
+        """
+            - Returns:
+                - str: metrics in Prometheus text exposition format
+        """
+        lines = [
+            "# TYPE pipeline_calls_total counter",
+            "# TYPE pipeline_errors_total counter",
+            "# TYPE pipeline_retries_total counter",
+            "# TYPE pipeline_cache_hits_total counter",
+            "# TYPE pipeline_tokens_total counter",
+            "# TYPE pipeline_cost_usd_total counter",
+            "# TYPE pipeline_call_seconds histogram",
+        ]
+        with self._lock:
+            for stage, metrics in sorted(self.stages.items()):
+                label = f'stage="{stage}"'
+                lines += [
+                    f"pipeline_calls_total{{{label}}} {metrics.calls}",
+                    f"pipeline_errors_total{{{label}}} {metrics.errors}",
+                    f"pipeline_retries_total{{{label}}} {metrics.retries}",
+                    f"pipeline_cache_hits_total{{{label}}} {metrics.cache_hits}",
+                    f'pipeline_tokens_total{{{label},kind="prompt"}} {metrics.prompt_tokens}',
+                    f'pipeline_tokens_total{{{label},kind="completion"}} {metrics.completion_tokens}',
+                    f"pipeline_cost_usd_total{{{label}}} {metrics.cost:.6f}",
+                ]
+                for bound, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                    lines.append(f'pipeline_call_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines += [
+                    f'pipeline_call_seconds_bucket{{{label},le="+Inf"}} {metrics.calls}',
+                    f"pipeline_call_seconds_sum{{{label}}} {metrics.seconds:.6f}",
+                    f"pipeline_call_seconds_count{{{label}}} {metrics.calls}",
+                ]
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self):
+        directory = os.path.dirname(self.metrics_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.metrics_path, "w") as file:
+            file.write(self.prometheus())
+
+    def serve_metrics(self, port):
+        """
+            - Parameters:
+                - port: int
+
+            - Description:
+                - Serves GET /metrics from a daemon thread.
+        """
+        if self._server is not None:
+            return
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = tracer.prometheus().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("0.0.0.0", int(port)), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+
+    def summary(self, generated=None):
+        """
+            - Parameters:
+                - generated: int or None (emails or call scripts produced, for cost per item)
+
+            - Returns:
+                - str: hot stages by total time, with tokens, retries, cache hits and cost
+        """
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1].seconds, reverse=True)
+            total_cost = sum(metrics.cost for _, metrics in stages)
+        wall = time.time() - self.started_at
+        lines = [f"Run summary ({wall:.1f}s wall):"]
+        for stage, metrics in stages:
+            average = metrics.seconds / metrics.calls if metrics.calls else 0.0
+            lines.append(
+                f"  {stage:<16} {metrics.seconds:9.2f}s in {metrics.calls} calls (avg {average * 1000:.0f}ms), "
+                f"errors={metrics.errors} retries={metrics.retries} cache_hits={metrics.cache_hits} "
+                f"tokens={metrics.prompt_tokens}+{metrics.completion_tokens} cost=${metrics.cost:.4f}"
+            )
+        lines.append(f"  total cost ${total_cost:.4f}")
+        if generated:
+            lines.append(f"  cost per generated item ${total_cost / generated:.5f} ({generated} items)")
+        return "\n".join(lines)
+
+    def finish(self, generated=None):
+        """
+            - Description:
+                - Prints the end-of-run summary, writes the metrics file and flushes the trace file.
+        """
+        print(self.summary(generated))
+        self.write_metrics()
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.flush()
+
+
+class _TracingCallbacks:
+    """
+        - Parameters:
+            - tracer: Tracer
+            - llm_stage: str
+            - retriever_stage: str
+
+        - Description:
+            - LangChain callback that times chat model and retriever runs and records their token usage.
+            - Combined with BaseCallbackHandler on first use, so importing this module never loads LangChain.
+    """
+
+    def __init__(self, tracer, llm_stage="llm", retriever_stage="retriever"):
+        self.tracer = tracer
+        self.llm_stage = llm_stage
+        self.retriever_stage = retriever_stage
+        self._runs = {}
+
+    def _start(self, run_id, stage, model=None):
+        self._runs[run_id] = (stage, model, time.perf_counter())
+
+    def _end(self, run_id, **fields):
+        stage, model, started = self._runs.pop(run_id, (None, None, None))
+        if stage is not None:
+            self.tracer.record(stage, time.perf_counter() - started, model=model, **fields)
+
+    @staticmethod
+    def _model(kwargs):
+        params = kwargs.get("invocation_params") or {}
+        return params.get("model_name") or params.get("model")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, self.llm_stage, self._model(kwargs))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, self.llm_stage, self._model(kwargs))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage and response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            metadata = getattr(message, "usage_metadata", None) or {}
+            prompt_tokens = metadata.get("input_tokens", 0)
+            completion_tokens = metadata.get("output_tokens", 0)
+        self._end(run_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, status="error", error=str(error)[:200])
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id, self.retriever_stage)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, status="error", error=str(error)[:200])
+
+
+_handler_class = None
+
+def _callback_handler_class():
+    global _handler_class
+    if _handler_class is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+        _handler_class = type("TracingCallbackHandler", (_TracingCallbacks, BaseCallbackHandler), {})
+    return _handler_class
+
+
+def __getattr__(name):
+    if name == "TracingCallbackHandler":
+        return _callback_handler_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def get_tracer():
+    """
+        - Returns:
+            - Tracer: the process-wide tracer (starts the /metrics server when METRICS_PORT is set)
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+            if METRICS_PORT:
+                _tracer.serve_metrics(METRICS_PORT)
+        return _tracer
+
+def tracing_callbacks(llm_stage="llm"):
+    """
+        - Returns:
+            - list: callbacks to attach to a runnable with `.with_config(callbacks=...)`
+    """
+    return [_callback_handler_class()(get_tracer(), llm_stage=llm_stage)]
@@ -1,5 +1,7 @@
 import pandas as pd
 import os 
+from helpers.domain_index import DomainIndex, domain_of, extract_domains
+from helpers.prospect_stream import iter_prospect_chunks, read_domain_index, DEFAULT_CHUNK_SIZE
 
 def read_data(prospects_path, existing_customers_path):
     """_summary_
@@ -38,48 +40,78 @@ def read_data(prospects_path, existing_customers_path):
 
     return prospects, existing_customers
 
-def find_matching_domain_emails(email, df):
+def stream_data(prospects_path, existing_customers_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+        - Parameters:
+            - prospects_path: str
+            - existing_customers_path: str
+            - chunk_size: int
+
+        - Returns:
+            - tuple: generator of normalized prospect chunks, DomainIndex of the existing customers
+
+        - Description:
+            - Bounded-memory counterpart of read_data for lists too large to load whole.
+            - Customers are reduced to a domain -> account names index while reading them in chunks;
+              prospects are only read as the generator is consumed.
+    """
+    try:
+        customers = read_domain_index(existing_customers_path, 'AP Email', 'Account Name', chunk_size)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Existing customers file not found at path: {existing_customers_path}")
+    except pd.errors.EmptyDataError:
+        raise ValueError(f"Existing customers file at path {existing_customers_path} is empty")
+    return iter_prospect_chunks(prospects_path, chunk_size), customers
+
+def find_matching_domain_emails(email, df, domain_index=None):
     """
     Finds all email addresses in the DataFrame with the same domain as the given email and appends the associated Account Names to a list.
 
     Args:
         email (str): The email address to match the domain.
         df (pd.DataFrame): The DataFrame containing 'AP Email' and 'Account Name' columns.
+        domain_index (DomainIndex, optional): Index over df, built once with DomainIndex.from_customers(df)
+            (or stream_data) and shared by every call. Built from df when omitted, which rescans it on
+            every call.
 
     Returns:
         list: A list of Account Names with matching domains.
+
+    Raises:
+        ValueError: If domain_index is omitted and df lacks the 'AP Email' or 'Account Name' column.
     """
-    # Extract domain from the given email
-    try:
-        domain = email.split('@')[1]
-    except IndexError:
-        raise ValueError("Invalid email address")
+    if domain_index is None:
+        domain_index = DomainIndex.from_customers(df)
 
-    # Check if necessary columns exist in the DataFrame
-    if 'AP Email' not in df.columns or 'Account Name' not in df.columns:
-        raise ValueError("The DataFrame must contain 'AP Email' and 'Account Name' columns")
+    # Extract domain from the given email
+    domain = domain_of(email)
 
     # Initialize the organization list
     orgs = []
     flag = True
 
-    # Filter rows with the same domain
-    matching_rows = df[df['AP Email'].str.endswith(f'@{domain}', na=False)]
+    # Look up the accounts with the same domain
+    matching_accounts = domain_index.accounts(domain)
 
     # Check the number of matching rows
-    if matching_rows.empty:
+    if not matching_accounts:
         print("No matching emails found, returning 2 customers.")
         # Select 2 random Account Names from the DataFrame
         flag = False
         orgs = df.sample(2)['Account Name'].tolist()
-    elif len(matching_rows) == 1:
+    elif len(matching_accounts) == 1:
         print("Only 1 matching email found, returning 1 customer.")
         # Add the single matching Account Name and one random Account Name
-        orgs = matching_rows['Account Name'].tolist()
-        orgs.append(df[~df.index.isin(matching_rows.index)].sample(1)['Account Name'].values[0])
+        orgs = list(matching_accounts)
+        # Draw a few random candidates first so the common case avoids a full scan
+        candidates = df.sample(min(len(df), 8))
+        others = candidates[extract_domains(candidates['AP Email']) != domain]
+        if others.empty:
+            others = df[extract_domains(df['AP Email']) != domain]
+        orgs.append(others.sample(1)['Account Name'].values[0])
     else:
         # Add all matching Account Names
-        orgs = matching_rows['Account Name'].tolist()
+        orgs = list(matching_accounts)
 
     return orgs, flag
 
@@ -0,0 +1,179 @@
+import fcntl
+import json
+import os
+import threading
+import time
+import requests
+from urllib.parse import urlsplit
+from helpers.tracing import get_tracer
+
+DEFAULT_TOKEN_CACHE_PATH = os.getenv("ZOHO_TOKEN_CACHE_PATH", "data/.zoho_token.json")
+# Refresh this many seconds before the token expires
+REFRESH_AHEAD_SECONDS = 300
+
+
+class ZohoTokenManager:
+    """
+        - Parameters:
+            - client_id: str
+            - client_secret: str
+            - refresh_token: str
+            - token_url: str
+            - cache_path: str
+            - refresh_ahead: float
+
+        - Description:
+            - Caches the Zoho access token and its expiry in memory and on disk, so repeated runs and
+              concurrent workers reuse one token instead of each posting to the token endpoint.
+            - Refreshes are serialized by a thread lock and an flock on `<cache_path>.lock`; after taking
+              the lock the disk cache is re-read, so only one process actually refreshes.
+            - start_background_refresh() keeps the token fresh ahead of expiry during long runs.
+    """
+
+    def __init__(self, client_id, client_secret, refresh_token, token_url, cache_path=DEFAULT_TOKEN_CACHE_PATH, refresh_ahead=REFRESH_AHEAD_SECONDS):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token = refresh_token
+        self.token_url = token_url
+        self.cache_path = cache_path
+        self.refresh_ahead = refresh_ahead
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def _is_fresh(self):
+        return self._token is not None and time.time() < self._expires_at - self.refresh_ahead
+
+    def _read_disk(self):
+        try:
+            with open(self.cache_path, "r") as file:
+                cached = json.load(file)
+            self._token = cached["access_token"]
+            self._expires_at = float(cached["expires_at"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _write_disk(self):
+        temp_path = f"{self.cache_path}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as file:
+            json.dump({"access_token": self._token, "expires_at": self._expires_at}, file)
+        os.replace(temp_path, self.cache_path)
+
+    def _request_token(self):
+        print("Fetching Zoho access token...")
+        payload = {
+            "refresh_token": self.refresh_token,
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "grant_type": "refresh_token"
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        try:
+            with get_tracer().span("zoho_token"):
+                response = requests.post(self.token_url, data=payload, headers=headers, timeout=30)
+                response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Request error: {e}")
+        response_json = response.json()
+        if "access_token" not in response_json:
+            raise Exception(f"Failed to get access token: {response_json.get('error', 'Unknown error')}")
+        self._token = response_json["access_token"]
+        self._expires_at = time.time() + float(response_json.get("expires_in", 3600))
+        print("Access token obtained successfully.")
+
+    def get_token(self, force_refresh=False):
+        """
+            - Parameters:
+                - force_refresh: bool (discard the cached token, e.g. after a 401)
+
+            - Returns:
+                - str: access_token
+        """
+        if not force_refresh and self._is_fresh():
+            return self._token
+
+        with self._lock:
+            stale_token = self._token if force_refresh else None
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(f"{self.cache_path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._read_disk()
+                    # Another thread or process may have refreshed while we waited for the lock
+                    if self._is_fresh() and self._token != stale_token:
+                        return self._token
+                    self._request_token()
+                    self._write_disk()
+                    return self._token
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def request(self, session, method, url, **kwargs):
+        """
+            - Parameters:
+                - session: requests.Session or the requests module
+                - method: str
+                - url: str
+
+            - Returns:
+                - requests.Response
+
+            - Description:
+                - Sends an authorized request and retries once with a forced refresh on 401.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers["Authorization"] = f"Zoho-oauthtoken {self.get_token()}"
+        tracer = get_tracer()
+        path = urlsplit(url).path
+        with tracer.span("zoho", method=method, path=path):
+            response = session.request(method, url, headers=headers, **kwargs)
+        if response.status_code == 401:
+            tracer.record_retry("zoho")
+            headers["Authorization"] = f"Zoho-oauthtoken {self.get_token(force_refresh=True)}"
+            with tracer.span("zoho", method=method, path=path):
+                response = session.request(method, url, headers=headers, **kwargs)
+        return response
+
+    def start_background_refresh(self, interval=60):
+        """
+            - Parameters:
+                - interval: float (seconds between expiry checks)
+
+            - Description:
+                - Starts a daemon thread that refreshes the token before it expires.
+        """
+        if self._refresher is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.get_token()
+                except Exception as e:
+                    print(f"Background Zoho token refresh failed: {e}")
+
+        self._refresher = threading.Thread(target=run, name="zoho-token-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_token_manager(client_id, client_secret, refresh_token, token_url):
+    """
+        - Returns:
+            - ZohoTokenManager: one shared manager per client in this process
+    """
+    with _managers_lock:
+        key = (client_id, token_url)
+        if key not in _managers:
+            _managers[key] = ZohoTokenManager(client_id, client_secret, refresh_token, token_url)
+        return _managers[key]
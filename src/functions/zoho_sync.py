@@ -0,0 +1,157 @@
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+LEADS_FIELDS = ["id", "Email", "Modified_Time"]
+PER_PAGE = 200
+# Zoho only serves `page` up to 2,000 records; beyond that `page_token` is required
+MAX_PAGE_NUMBER = 2000 // PER_PAGE
+
+
+def build_session(pool_size=10, retries=3):
+    """
+        - Parameters:
+            - pool_size: int
+            - retries: int
+
+        - Returns:
+            - requests.Session: pooled session retrying 429/5xx with backoff
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class ZohoLeadSync:
+    """
+        - Parameters:
+            - base_url: str
+            - token_manager: ZohoTokenManager
+            - store_path: str
+            - state_path: str
+            - session: requests.Session or None
+            - max_workers: int
+
+        - Description:
+            - Downloads Zoho Leads (id, Email, Modified_Time only) over a pooled session.
+            - The first 2,000 records are fetched as concurrent page waves; later pages follow page_token.
+            - Runs after the first send If-Modified-Since, and the changes are merged into the
+              local CSV by lead id, so daily syncs only transfer deltas.
+    """
+
+    def __init__(self, base_url, token_manager, store_path="data/zoho_emails.csv", state_path="data/zoho_sync_state.json", session=None, max_workers=4):
+        self.base_url = base_url
+        self.token_manager = token_manager
+        self.store_path = store_path
+        self.state_path = state_path
+        self.session = session or build_session(pool_size=max_workers)
+        self.max_workers = max_workers
+
+    def _get_page(self, modified_since, page=None, page_token=None):
+        params = {"fields": ",".join(LEADS_FIELDS[1:]), "per_page": PER_PAGE}
+        if page_token:
+            params["page_token"] = page_token
+        else:
+            params["page"] = page
+        headers = {"If-Modified-Since": modified_since} if modified_since else {}
+
+        response = self.token_manager.request(self.session, "GET", f"{self.base_url}/Leads", params=params, headers=headers)
+        # 304 (nothing changed) and 204 (no records) both carry no body
+        if response.status_code in (204, 304):
+            return [], {"more_records": False}
+        response.raise_for_status()
+        body = response.json()
+        return body.get("data", []), body.get("info", {})
+
+    def fetch_changes(self, modified_since=None):
+        """
+            - Parameters:
+                - modified_since: str (ISO 8601) or None for a full download
+
+            - Returns:
+                - list: lead records changed since `modified_since`
+        """
+        records, info = self._get_page(modified_since, page=1)
+        page = 1
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while info.get("more_records") and page < MAX_PAGE_NUMBER:
+                wave = list(range(page + 1, min(page + self.max_workers, MAX_PAGE_NUMBER) + 1))
+                results = list(executor.map(lambda number: self._get_page(modified_since, page=number), wave))
+                for page_records, page_info in results:
+                    records.extend(page_records)
+                    info = page_info
+                    if not page_info.get("more_records"):
+                        break
+                page = wave[-1]
+
+        while info.get("more_records") and info.get("next_page_token"):
+            page_records, info = self._get_page(modified_since, page_token=info["next_page_token"])
+            records.extend(page_records)
+        return records
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r") as file:
+            return json.load(file)
+
+    def _load_store(self):
+        if not os.path.exists(self.store_path):
+            return {}
+        with open(self.store_path, "r", newline="", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            # Stores written before incremental sync only have an Email column
+            if "id" not in (reader.fieldnames or []):
+                return {}
+            return {row["id"]: row for row in reader}
+
+    def _write_store(self, leads):
+        directory = os.path.dirname(self.store_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.store_path}.tmp"
+        with open(temp_path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=LEADS_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(leads.values())
+        os.replace(temp_path, self.store_path)
+
+    def sync(self, full=False):
+        """
+            - Parameters:
+                - full: bool (ignore the saved state and re-download everything)
+
+            - Returns:
+                - list: every lead email in the local store after merging
+        """
+        state = {} if full else self._load_state()
+        leads = {} if full else self._load_store()
+        modified_since = state.get("last_sync") if leads else None
+        started_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+        changes = self.fetch_changes(modified_since)
+        for record in changes:
+            if record.get("id"):
+                leads[str(record["id"])] = record
+        print(f"Fetched {len(changes)} changed leads from Zoho CRM ({len(leads)} stored).")
+
+        if changes or not os.path.exists(self.store_path):
+            self._write_store(leads)
+        with open(self.state_path, "w") as file:
+            json.dump({"last_sync": started_at}, file)
+
+        return [lead.get("Email") for lead in leads.values() if lead.get("Email")]
@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from helpers.zoho_sync import build_session
+
+# Zoho accepts at most 100 records per insert/update/upsert call
+MAX_BATCH_SIZE = 100
+
+
+class ZohoBulkUpserter:
+    """
+        - Parameters:
+            - base_url: str
+            - token_manager: ZohoTokenManager
+            - session: requests.Session or None
+            - batch_size: int
+            - max_workers: int
+
+        - Description:
+            - Writes call scripts back to Zoho Leads with the upsert API, deduplicated on Email so reruns
+              update existing leads instead of creating new ones.
+            - Records are sent in batches of up to 100, with several batches in flight over a pooled session.
+    """
+
+    def __init__(self, base_url, token_manager, session=None, batch_size=MAX_BATCH_SIZE, max_workers=4):
+        self.url = f"{base_url}/Leads/upsert"
+        self.token_manager = token_manager
+        self.session = session or build_session(pool_size=max_workers)
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.max_workers = max_workers
+
+    def _send_batch(self, batch):
+        body = {
+            "data": [{"Email": email, "Call_Script": call_script} for email, call_script in batch],
+            "duplicate_check_fields": ["Email"]
+        }
+        try:
+            response = self.token_manager.request(self.session, "POST", self.url, json=body, headers={"Content-Type": "application/json"})
+            # 207 (multi-status) means a partial success and still carries per-record results
+            if response.status_code not in (200, 201, 202, 207):
+                response.raise_for_status()
+            records = response.json().get("data", [])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return [{"email": email, "success": False, "action": None, "message": str(e)} for email, _ in batch]
+
+        results = []
+        for (email, _), record in zip(batch, records):
+            results.append({
+                "email": email,
+                "success": record.get("status") == "success",
+                "action": record.get("action"),
+                "message": record.get("message", record.get("code"))
+            })
+        # Records the response did not mention are reported as failed rather than silently dropped
+        for email, _ in batch[len(records):]:
+            results.append({"email": email, "success": False, "action": None, "message": "Missing from Zoho response"})
+        return results
+
+    def upsert(self, pairs):
+        """
+            - Parameters:
+                - pairs: list of (email, call_script) tuples
+
+            - Returns:
+                - list: one dict per input pair (email, success, action, message), in input order
+        """
+        batches = [pairs[start:start + self.batch_size] for start in range(0, len(pairs), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return [result for batch_results in executor.map(self._send_batch, batches) for result in batch_results]
@@ -1,105 +1,146 @@
-import requests
-import pandas as pd
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import os
+import re
 from helpers.config import email_google_sheet, CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN, ZOHO_API_BASE_URL, TOKEN_URL
 from helpers.create_email import create_email
+from helpers.rate_limiter import DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+from helpers.campaign import run_campaign
+from helpers.manifest import CampaignManifest
+from helpers.tracing import get_tracer
+from helpers.zoho_auth import get_token_manager
+from helpers.zoho_sync import ZohoLeadSync
 
 # Constants for Google Sheets
 SPREADSHEET_ID = email_google_sheet
 SERVICE_ACCOUNT_FILE = 'credentials.json'
 
-def get_access_token(client_id, client_secret, refresh_token):
+def fetch_emails_from_zoho(token_manager, full=False):
     """
         - Parameters:
-            - client_id: str
-            - client_secret: str
-            - refresh_token: str
+            - token_manager: ZohoTokenManager
+            - full: bool
             
         - Returns:
-            - str: access_token
+            - list: zoho_emails
             
         - Description:
-            - Fetches the access token from Zoho CRM using the client_id, client_secret, and refresh_token.
+            - Syncs the Zoho CRM leads into data/zoho_emails.csv (only changes since the last run
+              unless full is True) and returns every stored lead email.
     """
-    payload = {
-        "refresh_token": refresh_token,
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "grant_type": "refresh_token"
-    }
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    response = requests.post(TOKEN_URL, data=payload, headers=headers)
-    response.raise_for_status()
-    return response.json().get("access_token")
-
-def fetch_emails_from_zoho(access_token):
+    return ZohoLeadSync(ZOHO_API_BASE_URL, token_manager).sync(full=full)
+
+_sheets_service = None
+
+def get_sheets_service():
     """
-        - Parameters:
-            - access_token: str
-            
         - Returns:
-            - list: zoho_emails
-            
-        - Description:
-            - Fetches the emails from Zoho CRM using the access_token.
+            - Resource: Sheets API client, built once per process
     """
-    headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
-    response = requests.get(f"{ZOHO_API_BASE_URL}/Leads", headers=headers)
-    response.raise_for_status()
-    return [record.get("Email") for record in response.json().get("data", []) if record.get("Email")]
+    global _sheets_service
+    if _sheets_service is None:
+        credentials = service_account.Credentials.from_service_account_file(
+            SERVICE_ACCOUNT_FILE, scopes=["https://www.googleapis.com/auth/spreadsheets"]
+        )
+        _sheets_service = build('sheets', 'v4', credentials=credentials)
+    return _sheets_service
 
-def upload_to_google_sheets(data):
+def read_sheet_rows():
+    """
+        - Returns:
+            - dict: email -> 1-based sheet row of every email already in the sheet (one column read)
+    """
+    with get_tracer().span("sheets", operation="values.get"):
+        response = get_sheets_service().spreadsheets().values().get(
+            spreadsheetId=SPREADSHEET_ID,
+            range='Sheet1!A:A'
+        ).execute()
+    return {row[0]: index for index, row in enumerate(response.get('values', []), start=1) if row and row[0]}
+
+def upsert_to_google_sheets(data, sheet_rows):
     """
         - Parameters:
             - data: list
-            
+            - sheet_rows: dict (email -> sheet row, from read_sheet_rows; updated with appended rows)
+
         - Description:
-            - Uploads the data to Google Sheets.
+            - Overwrites the rows of emails already in the sheet in one values.batchUpdate and appends
+              the rest in one values.append, so reruns never duplicate a prospect.
     """
-    credentials = service_account.Credentials.from_service_account_file(
-        SERVICE_ACCOUNT_FILE, scopes=["https://www.googleapis.com/auth/spreadsheets"]
-    )
-    service = build('sheets', 'v4', credentials=credentials)
-    
-    values = [[row.get('Email_address'), row.get('Subject'), row.get('Email Template Body')] for row in data]
-    
-    body = {'values': values}
-    service.spreadsheets().values().append(
-        spreadsheetId=SPREADSHEET_ID,
-        range='Sheet1!A1', 
-        valueInputOption="RAW",
-        insertDataOption="INSERT_ROWS", 
-        body=body
-    ).execute()
-
-def main():
+    updates = []
+    new_rows = []
+    for row in data:
+        values = [row.get('Email_address'), row.get('Subject'), row.get('Email Template Body')]
+        sheet_row = sheet_rows.get(row.get('Email_address'))
+        if sheet_row:
+            updates.append({'range': f'Sheet1!A{sheet_row}:C{sheet_row}', 'values': [values]})
+        else:
+            new_rows.append(values)
+
+    service = get_sheets_service()
+    if updates:
+        with get_tracer().span("sheets", operation="values.batchUpdate", rows=len(updates)):
+            service.spreadsheets().values().batchUpdate(
+                spreadsheetId=SPREADSHEET_ID,
+                body={'valueInputOption': 'RAW', 'data': updates}
+            ).execute()
+    if new_rows:
+        with get_tracer().span("sheets", operation="values.append", rows=len(new_rows)):
+            response = service.spreadsheets().values().append(
+                spreadsheetId=SPREADSHEET_ID,
+                range='Sheet1!A1',
+                valueInputOption="RAW",
+                insertDataOption="INSERT_ROWS",
+                body={'values': new_rows}
+            ).execute()
+        # updatedRange looks like "Sheet1!A120:C131"
+        first_row = int(re.search(r"!A(\d+)", response['updates']['updatedRange']).group(1))
+        for offset, values in enumerate(new_rows):
+            sheet_rows[values[0]] = first_row + offset
+
+def main(workers=1, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE):
     """
     Main function to authenticate with Zoho CRM, fetch emails, save emails to 
     CSV file, generate emails, and upload emails to Google Sheets.
+    With workers > 1, generation runs in that many processes over the campaign job queue.
+    requests_per_minute / tokens_per_minute size the OpenAI rate limiter.
     """
     print("Authenticating with Zoho CRM...")
-    access_token = get_access_token(CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN)
+    # Reuses the cached token from a previous run while it is still valid
+    token_manager = get_token_manager(CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN, TOKEN_URL)
+    token_manager.get_token()
 
-    print("Fetching emails from Zoho CRM...")
-    zoho_emails = fetch_emails_from_zoho(access_token)
+    print("Syncing emails from Zoho CRM...")
+    # Changed leads are merged into data/zoho_emails.csv
+    zoho_emails = fetch_emails_from_zoho(token_manager)
 
     if not zoho_emails:
         print("No emails found!")
         return
 
-    # Save Zoho emails to CSV file
-    pd.DataFrame({"Email": zoho_emails}).to_csv("data/zoho_emails.csv", index=False)
-    print(f"Saved {len(zoho_emails)} emails to data/zoho_emails.csv")
+    print(f"{len(zoho_emails)} emails stored in data/zoho_emails.csv")
 
     # Generate emails based on `prospects.csv`
-    generated_emails_df = create_email()
-    email_data = generated_emails_df.to_dict('records')
-    upload_to_google_sheets(email_data)
+    # Only new or changed prospects are generated; anything not yet synced is upserted below
+    manifest = CampaignManifest()
+    if workers > 1:
+        run_campaign(workers=workers, requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute, manifest_path=manifest.path)
+    else:
+        create_email(requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute, manifest=manifest, resume=False)
+    batches = manifest.iter_unsynced()
+
+    uploaded = 0
+    sheet_rows = None
+    for email_data in batches:
+        if sheet_rows is None:
+            sheet_rows = read_sheet_rows()
+        upsert_to_google_sheets(email_data, sheet_rows)
+        manifest.mark_synced(email_data)
+        uploaded += len(email_data)
 
     print("Emails successfully uploaded to Google Sheets!")
+    get_tracer().finish(generated=uploaded)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(workers=int(os.getenv("CAMPAIGN_WORKERS", "1")))
\ No newline at end of file
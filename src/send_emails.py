@@ -0,0 +1,94 @@
+import argparse
+import os
+from helpers.event_store import DEFAULT_EVENT_STORE_PATH
+from helpers.send_dispatcher import (
+    Alias, AliasQuotaStore, AliasScheduler, CSVStatusWriter, LocalSMTPServer, SendDispatcher, SheetStatusWriter,
+    SMTPTransport, DEFAULT_ALIAS_STATE_PATH, DEFAULT_DAILY_QUOTA, DEFAULT_SENDS_PER_MINUTE, DEFAULT_TRACKING_PIXEL_URL,
+    load_jobs_from_csv, load_jobs_from_sheet
+)
+from helpers.tracing import get_tracer
+
+
+def parse_alias(value):
+    """
+        - Parameters:
+            - value: str (address[:daily_quota[:per_minute]])
+
+        - Returns:
+            - Alias
+    """
+    address, _, rest = value.partition(":")
+    quota, _, per_minute = rest.partition(":")
+    return Alias(address, int(quota or DEFAULT_DAILY_QUOTA), float(per_minute or DEFAULT_SENDS_PER_MINUTE))
+
+
+def main():
+    """
+    Sends the generated campaign (Python replacement for sendEmails in app_script.js).
+
+    Reads the email sheet (or data/generated_emails.csv) once, spreads sends across aliases by remaining
+    daily quota and send rate over pooled SMTP connections, and writes Last Sent / Sent / Sent Timestamp
+    back in batched updates. Rows that already have a Sent Timestamp (with --source csv: that are logged
+    as Sent in --status-csv) are skipped.
+    """
+    parser = argparse.ArgumentParser(description="Quota-aware email send dispatcher")
+    parser.add_argument("--source", choices=("sheet", "csv"), default="sheet")
+    parser.add_argument("--csv", default="data/generated_emails.csv", help="Emails to send with --source csv")
+    parser.add_argument("--status-csv", default="data/send_status.csv", help="Send log written with --source csv")
+    parser.add_argument("--alias", action="append", type=parse_alias, help="address[:daily_quota[:per_minute]], repeatable (default: SEND_ALIASES)")
+    parser.add_argument("--smtp-host", default=os.getenv("SMTP_HOST", "smtp.gmail.com"))
+    parser.add_argument("--smtp-port", type=int, default=int(os.getenv("SMTP_PORT", "587")))
+    parser.add_argument("--pool-size", type=int, default=2, help="SMTP connections per alias")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--flush-every", type=int, default=500, help="Status updates per batched write")
+    parser.add_argument("--tracking-url", default=DEFAULT_TRACKING_PIXEL_URL)
+    parser.add_argument("--quota-state", default=DEFAULT_ALIAS_STATE_PATH)
+    parser.add_argument("--local-smtp", action="store_true", help="Send to an in-process SMTP sink instead of --smtp-host (dry run)")
+    parser.add_argument("--event-store", nargs="?", const=DEFAULT_EVENT_STORE_PATH, help="Also record every send in this engagement event store")
+    args = parser.parse_args()
+
+    aliases = args.alias or [parse_alias(value) for value in os.getenv("SEND_ALIASES", "").split(",") if value]
+    if not aliases:
+        parser.error("no aliases configured; pass --alias or set SEND_ALIASES")
+
+    if args.source == "sheet":
+        from helpers.config import email_google_sheet
+        from helpers.sheets_io import SheetsIO
+        worksheet = SheetsIO('/home/fox/ai/src/credentials.json').worksheet(email_google_sheet)
+        jobs = load_jobs_from_sheet(worksheet)
+        status_writer = SheetStatusWriter(worksheet)
+    else:
+        status_writer = CSVStatusWriter(args.status_csv)
+        jobs = load_jobs_from_csv(args.csv, exclude=status_writer.sent_emails())
+
+    local_server = None
+    if args.local_smtp:
+        local_server = LocalSMTPServer().start()
+        host, port = local_server.address
+        transport = SMTPTransport(host, port, starttls=False, pool_size=args.pool_size)
+    else:
+        transport = SMTPTransport(
+            args.smtp_host, args.smtp_port, os.getenv("SMTP_USERNAME"), os.getenv("SMTP_PASSWORD"), pool_size=args.pool_size
+        )
+
+    event_store = None
+    if args.event_store:
+        from helpers.event_store import EventStore
+        event_store = EventStore(args.event_store)
+
+    dispatcher = SendDispatcher(
+        transport, AliasScheduler(aliases, AliasQuotaStore(args.quota_state)), status_writer,
+        tracking_pixel_url=args.tracking_url, max_workers=args.workers, flush_every=args.flush_every, event_store=event_store
+    )
+    print(f"Sending {len(jobs)} emails from {len(aliases)} aliases...")
+    try:
+        counts = dispatcher.dispatch(jobs)
+    finally:
+        transport.close()
+        if local_server is not None:
+            local_server.stop()
+        get_tracer().finish(generated=len(jobs))
+    print(f"Sent {counts['Sent']}, failed {counts['Failed']}, deferred {counts['Deferred']} (aliases out of quota).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs, quote
+from helpers.event_store import DEFAULT_EVENT_STORE_PATH
+
+# Same 1x1 transparent GIF the Apps Script endpoint returns
+PIXEL = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xFF\xFF\xFF\xFF\xFF\xFF\x21\xF9\x04\x01\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x4C\x01\x00\x3B'
+)
+
+# Sheet columns (0-based), matching app_script.js
+EMAIL_INDEX = 0
+OPEN_TRACKING_INDEX = 4
+LAST_OPEN_INDEX = 5
+OPEN_AMOUNT_INDEX = 6
+SENT_TIMESTAMP_INDEX = 7
+
+# Opens this soon after sending are the sender's own client loading the pixel
+SELF_OPEN_SECONDS = 10
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S", "%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+
+
+def parse_timestamp(value):
+    """
+        - Parameters:
+            - value: str
+
+        - Returns:
+            - float: epoch seconds, or None if the value cannot be parsed
+    """
+    value = str(value).strip()
+    for timestamp_format in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, timestamp_format).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_open_amount(value):
+    try:
+        return int(value or 0)
+    except ValueError:
+        return 0
+
+
+class TrackedEmail:
+    __slots__ = ("email", "row", "sent", "sent_at", "open_amount", "pending_opens", "last_open")
+
+    def __init__(self, email, row, sent, sent_at, open_amount):
+        self.email = email
+        self.row = row
+        self.sent = sent
+        self.sent_at = sent_at
+        self.open_amount = open_amount
+        # Opens counted since the last successful flush; added to the sink's current count on write
+        self.pending_opens = 0
+        self.last_open = None
+
+
+class SheetSink:
+    """
+        - Parameters:
+            - worksheet: gspread.Worksheet
+
+        - Description:
+            - Loads the email -> row index from the tracking sheet and writes aggregated opens back
+              with one batch_update per flush.
+            - Each write re-reads only the email column and the Open Amount cells it updates: rows are
+              resolved by email (other jobs delete rows, so cached row numbers go stale) and pending opens
+              are added to the current Open Amount, so a reset by the sender is not overwritten.
+    """
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def load(self):
+        index = {}
+        for row_number, row in enumerate(self.worksheet.get_all_values()[1:], start=2):
+            row = row + [""] * (SENT_TIMESTAMP_INDEX + 1 - len(row))
+            email = row[EMAIL_INDEX].strip()
+            if not email:
+                continue
+            sent_value = row[SENT_TIMESTAMP_INDEX]
+            index[email] = TrackedEmail(
+                email, row_number, bool(sent_value), parse_timestamp(sent_value) if sent_value else None,
+                parse_open_amount(row[OPEN_AMOUNT_INDEX])
+            )
+        return index
+
+    def write(self, opens):
+        """
+            - Parameters:
+                - opens: list of (email, new opens, last open epoch seconds)
+        """
+        emails = self.worksheet.col_values(EMAIL_INDEX + 1)
+        row_by_email = {email.strip(): row for row, email in enumerate(emails[1:], start=2) if email.strip()}
+        targets = []
+        for email, count, last_open in opens:
+            row = row_by_email.get(email)
+            if row is None:
+                print(f"Dropping {count} opens for {email}: no longer in the sheet")
+                continue
+            targets.append((row, count, last_open))
+        if not targets:
+            return
+
+        amounts = self.worksheet.batch_get([f"G{row}:G{row}" for row, _, _ in targets])
+        updates = []
+        for (row, count, last_open), amount in zip(targets, amounts):
+            open_amount = parse_open_amount(amount[0][0] if amount and amount[0] else "")
+            updates.append({
+                "range": f"E{row}:G{row}",
+                "values": [["Opened", time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_open)), open_amount + count]]
+            })
+        self.worksheet.batch_update(updates, value_input_option="USER_ENTERED")
+
+
+class LocalFileSink:
+    """
+        - Parameters:
+            - emails_csv: str (CSV with an Email_address column and optional Sent Timestamp column)
+            - output_path: str
+
+        - Description:
+            - Sheet-free sink for local runs and load tests. Aggregated opens are kept in a JSON file.
+    """
+
+    def __init__(self, emails_csv, output_path="data/open_tracking.json"):
+        self.emails_csv = emails_csv
+        self.output_path = output_path
+        self.state = {}
+        if os.path.exists(output_path):
+            with open(output_path, "r") as file:
+                self.state = json.load(file)
+
+    def load(self):
+        index = {}
+        with open(self.emails_csv, "r", newline="", encoding="utf-8") as file:
+            for row_number, row in enumerate(csv.DictReader(file), start=2):
+                email = (row.get("Email_address") or "").strip()
+                if not email:
+                    continue
+                sent_value = row.get("Sent Timestamp") or ""
+                opens = self.state.get(email, {}).get("open_amount", 0)
+                # Local CSVs may predate sending, so every listed email counts as sent
+                index[email] = TrackedEmail(email, row_number, True, parse_timestamp(sent_value) if sent_value else None, opens)
+        return index
+
+    def write(self, opens):
+        for email, count, last_open in opens:
+            self.state[email] = {"open_amount": self.state.get(email, {}).get("open_amount", 0) + count, "last_open": last_open}
+        temp_path = f"{self.output_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.state, file)
+        os.replace(temp_path, self.output_path)
+
+
+class TrackingService:
+    """
+        - Parameters:
+            - sink: SheetSink or LocalFileSink
+            - flush_interval: float
+            - reload_interval: float
+            - event_store: EventStore or None
+
+        - Description:
+            - Python replacement for doGet/updateEmailStatus in app_script.js.
+            - Pixel hits are resolved against an in-memory email -> row index and only mark the entry dirty;
+              a background task flushes all dirty entries to the sink every `flush_interval` seconds.
+              Only the opens counted since the last flush are sent, so the sink adds them to its own count.
+            - The index is reloaded every `reload_interval` seconds (and sooner when an unknown or
+              not-yet-sent email is opened), so new rows and fresh Sent Timestamps are picked up.
+            - With an event store, every counted open is also appended to it on each flush.
+    """
+
+    def __init__(self, sink, flush_interval=5.0, reload_interval=60.0, event_store=None):
+        self.sink = sink
+        self.event_store = event_store
+        self._events = []
+        self.flush_interval = flush_interval
+        self.reload_interval = reload_interval
+        self.index = {}
+        self._dirty = set()
+        self.hits = 0
+        self.counted = 0
+        self._loaded_at = 0.0
+        self._reloading = None
+        # Serializes reload and flush, so pending opens are neither lost nor carried over twice
+        self._sink_lock = asyncio.Lock()
+
+    async def reload(self):
+        async with self._sink_lock:
+            index = await asyncio.to_thread(self.sink.load)
+            # Keep opens that have not been flushed yet
+            dirty = set()
+            for entry in self._dirty:
+                if entry.email in index:
+                    index[entry.email].pending_opens = entry.pending_opens
+                    index[entry.email].last_open = entry.last_open
+                    dirty.add(index[entry.email])
+            self.index = index
+            self._dirty = dirty
+            self._loaded_at = time.monotonic()
+
+    def _maybe_reload(self):
+        if self._reloading is None and time.monotonic() - self._loaded_at > self.reload_interval:
+            self._reloading = asyncio.ensure_future(self.reload())
+            self._reloading.add_done_callback(lambda _: setattr(self, "_reloading", None))
+
+    def record_open(self, email, now=None):
+        """
+            - Parameters:
+                - email: str
+                - now: float or None
+
+            - Returns:
+                - bool: True if the open was counted
+        """
+        self.hits += 1
+        now = now if now is not None else time.time()
+        entry = self.index.get(email)
+        if entry is None or not entry.sent:
+            self._maybe_reload()
+            return False
+        if entry.sent_at is not None and now - entry.sent_at < SELF_OPEN_SECONDS:
+            return False
+        entry.pending_opens += 1
+        entry.last_open = now
+        self._dirty.add(entry)
+        if self.event_store is not None:
+            self._events.append((email, "open", now))
+        self.counted += 1
+        return True
+
+    async def flush(self):
+        events, self._events = self._events, []
+        if events:
+            try:
+                await asyncio.to_thread(self.event_store.record_events, events)
+            except Exception as e:
+                print(f"Failed to store {len(events)} open events: {e}")
+                self._events = events + self._events
+
+        async with self._sink_lock:
+            dirty, self._dirty = list(self._dirty), set()
+            if not dirty:
+                return 0
+            opens = [(entry.email, entry.pending_opens, entry.last_open) for entry in dirty]
+            try:
+                await asyncio.to_thread(self.sink.write, opens)
+            except Exception as e:
+                print(f"Failed to flush {len(dirty)} opens: {e}")
+                self._dirty.update(dirty)
+                return 0
+            for entry, (_, count, _) in zip(dirty, opens):
+                entry.open_amount += count
+                entry.pending_opens -= count
+                # Opens counted while the write was in flight go out with the next flush
+                if entry.pending_opens:
+                    self._dirty.add(entry)
+            return len(dirty)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            written = await self.flush()
+            if written:
+                print(f"Flushed {written} updated rows ({self.counted} opens counted / {self.hits} hits)")
+            if time.monotonic() - self._loaded_at > self.reload_interval:
+                try:
+                    await self.reload()
+                except Exception as e:
+                    print(f"Failed to reload tracked emails: {e}")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = (lines[0].split(" ") + ["", ""])[:3]
+                keep_alive = version == "HTTP/1.1" and "connection: close" not in head.decode("latin-1").lower()
+
+                if method == "GET":
+                    emails = parse_qs(urlsplit(target).query).get("email")
+                    if emails:
+                        self.record_open(emails[0].strip())
+                        status, body, content_type = "200 OK", PIXEL, "image/gif"
+                    else:
+                        status, body, content_type = "400 Bad Request", b"Error: Missing parameters.", "text/plain"
+                else:
+                    status, body, content_type = "405 Method Not Allowed", b"", "text/plain"
+
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                    f"Cache-Control: no-store\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="0.0.0.0", port=8080):
+        await self.reload()
+        print(f"Loaded {len(self.index)} tracked emails; listening on {host}:{port}")
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        flusher = asyncio.ensure_future(self._flush_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            flusher.cancel()
+            await self.flush()
+
+
+async def load_test(host, port, emails, requests_total=10000, connections=50):
+    """
+        - Parameters:
+            - host: str
+            - port: int
+            - emails: list of str
+            - requests_total: int
+            - connections: int
+
+        - Returns:
+            - float: requests per second
+
+        - Description:
+            - Fires pixel requests over `connections` keep-alive connections and reports throughput.
+    """
+    per_connection = requests_total // connections
+
+    async def client(offset):
+        reader, writer = await asyncio.open_connection(host, port)
+        for i in range(per_connection):
+            email = emails[(offset + i) % len(emails)]
+            writer.write(f"GET /?email={quote(email)} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            await reader.readexactly(length)
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(offset) for offset in range(connections)))
+    elapsed = time.perf_counter() - started
+    return per_connection * connections / elapsed
+
+
+def main():
+    """
+    Runs the open-tracking pixel server, or a local load test against a running server.
+    """
+    parser = argparse.ArgumentParser(description="Open-tracking pixel server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--flush-interval", type=float, default=5.0)
+    parser.add_argument("--local-csv", help="Track emails from this CSV and keep counts in a local JSON file instead of the sheet")
+    parser.add_argument("--event-store", nargs="?", const=DEFAULT_EVENT_STORE_PATH, help="Also append every counted open to this engagement event store")
+    parser.add_argument("--load-test", type=int, metavar="N", help="Send N requests to a running server and report requests/sec")
+    args = parser.parse_args()
+
+    if args.load_test:
+        with open(args.local_csv or "data/generated_emails.csv", "r", newline="", encoding="utf-8") as file:
+            emails = [row["Email_address"] for row in csv.DictReader(file)]
+        rate = asyncio.run(load_test("127.0.0.1" if args.host == "0.0.0.0" else args.host, args.port, emails, args.load_test))
+        print(f"{rate:.0f} requests/sec")
+        return
+
+    if args.local_csv:
+        sink = LocalFileSink(args.local_csv)
+    else:
+        from helpers.config import email_google_sheet
+        from helpers.sheets_io import SheetsIO
+        sink = SheetSink(SheetsIO('/home/fox/ai/src/credentials.json').worksheet(email_google_sheet))
+
+    event_store = None
+    if args.event_store:
+        from helpers.event_store import EventStore
+        event_store = EventStore(args.event_store)
+
+    asyncio.run(TrackingService(sink, flush_interval=args.flush_interval, event_store=event_store).serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()